@@ -21,6 +21,14 @@ type Quiz = {
   choices: string[] | null;
 };
 
+type FeedPage = {
+  reels: Reel[];
+  quiz: Quiz | null;
+  next_cursor: string | null;
+  // Server hints for the reels after this page; expo-av has no preload API, so unused for now.
+  prefetch_urls: string[];
+};
+
 const { height: SCREEN_H } = Dimensions.get('window');
 const N_REELS_PER_QUIZ = 3;
 
@@ -36,6 +44,8 @@ function captionFromVtt(vtt: string | null) {
 export function FeedScreen() {
   const { courseId } = useCourse();
   const [reels, setReels] = useState<Reel[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const loadingMoreRef = useRef(false);
   const [quiz, setQuiz] = useState<Quiz | null>(null);
   const [quizVisible, setQuizVisible] = useState(false);
   const [reelIndex, setReelIndex] = useState(0);
@@ -52,9 +62,26 @@ export function FeedScreen() {
 
   async function refresh() {
     if (!courseId) return;
-    const data = (await apiFetch(`/feed?course_id=${courseId}&limit=20`)) as { reels: Reel[]; quiz: Quiz | null };
+    const data = (await apiFetch(`/feed?course_id=${courseId}&limit=20`)) as FeedPage;
     setReels(data.reels ?? []);
     setQuiz(data.quiz ?? null);
+    setNextCursor(data.next_cursor ?? null);
+  }
+
+  async function loadMore() {
+    if (!courseId || !nextCursor || loadingMoreRef.current) return;
+    loadingMoreRef.current = true;
+    try {
+      const data = (await apiFetch(
+        `/feed?course_id=${courseId}&limit=20&cursor=${encodeURIComponent(nextCursor)}`
+      )) as FeedPage;
+      setReels((prev) => [...prev, ...(data.reels ?? [])]);
+      setNextCursor(data.next_cursor ?? null);
+    } catch {
+      // Keep the current page; the next scroll to the end retries.
+    } finally {
+      loadingMoreRef.current = false;
+    }
   }
 
   useEffect(() => {
@@ -134,6 +161,8 @@ export function FeedScreen() {
         scrollEventThrottle={16}
         viewabilityConfig={viewabilityConfig}
         onViewableItemsChanged={onViewableItemsChanged}
+        onEndReached={loadMore}
+        onEndReachedThreshold={2}
         renderItem={({ item }) => (
           <View style={[styles.reelContainer, { height: SCREEN_H }]}>
             <Video
@@ -0,0 +1,37 @@
+"""ANN index on chunk embeddings
+
+Revision ID: 0002_chunk_embedding_ann_index
+Revises: 0001_init
+Create Date: 2026-10-17
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "0002_chunk_embedding_ann_index"
+down_revision = "0001_init"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # HNSW needs no training data (unlike IVFFlat), so it can be built on an empty table.
+    # CONCURRENTLY keeps `chunks` writable while the index builds on existing deployments.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_chunks_embedding_hnsw",
+            "chunks",
+            ["embedding"],
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_chunks_embedding_hnsw", table_name="chunks", postgresql_concurrently=True)
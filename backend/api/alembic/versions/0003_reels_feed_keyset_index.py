@@ -0,0 +1,30 @@
+"""keyset index for the reel feed
+
+Revision ID: 0003_reels_feed_keyset_index
+Revises: 0002_chunk_embedding_ann_index
+Create Date: 2026-10-17
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_reels_feed_keyset_index"
+down_revision = "0002_chunk_embedding_ann_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_reels_course_created_id",
+        "reels",
+        ["course_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reels_course_created_id", table_name="reels")
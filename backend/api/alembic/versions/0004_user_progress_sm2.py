@@ -0,0 +1,37 @@
+"""SM-2 review state and due-queue index on user_progress
+
+Revision ID: 0004_user_progress_sm2
+Revises: 0003_reels_feed_keyset_index
+Create Date: 2026-10-17
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_user_progress_sm2"
+down_revision = "0003_reels_feed_keyset_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("user_progress", sa.Column("ease_factor", sa.Float(), nullable=False, server_default="2.5"))
+    op.add_column("user_progress", sa.Column("interval_days", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("user_progress", sa.Column("repetitions", sa.Integer(), nullable=False, server_default="0"))
+    op.create_index(
+        "ix_user_progress_due",
+        "user_progress",
+        ["user_id", "next_review_at"],
+        postgresql_where=sa.text("next_review_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_progress_due", table_name="user_progress")
+    op.drop_column("user_progress", "repetitions")
+    op.drop_column("user_progress", "interval_days")
+    op.drop_column("user_progress", "ease_factor")
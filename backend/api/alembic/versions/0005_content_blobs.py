@@ -0,0 +1,43 @@
+"""content-addressed upload blobs
+
+Revision ID: 0005_content_blobs
+Revises: 0004_user_progress_sm2
+Create Date: 2026-10-17
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0005_content_blobs"
+down_revision = "0004_user_progress_sm2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "content_blobs",
+        sa.Column("sha256", sa.String(length=64), primary_key=True),
+        sa.Column("object_key", sa.String(length=500), nullable=False),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("content_type", sa.String(length=200)),
+        sa.Column(
+            "canonical_upload_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("uploads.id", ondelete="SET NULL"),
+        ),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
+    )
+    op.add_column("uploads", sa.Column("content_sha256", sa.String(length=64)))
+    op.create_index("ix_uploads_content_sha256", "uploads", ["content_sha256"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_uploads_content_sha256", table_name="uploads")
+    op.drop_column("uploads", "content_sha256")
+    op.drop_table("content_blobs")
@@ -0,0 +1,39 @@
+"""generation cache for MiniMax outputs
+
+Revision ID: 0006_generation_cache
+Revises: 0005_content_blobs
+Create Date: 2026-10-17
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006_generation_cache"
+down_revision = "0005_content_blobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "generation_cache",
+        sa.Column("key", sa.String(length=64), primary_key=True),
+        sa.Column("kind", sa.String(length=20), nullable=False),
+        sa.Column("value_json", sa.JSON(), nullable=False),
+        sa.Column("hit_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
+        sa.Column("last_hit_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_generation_cache_last_hit_at", "generation_cache", ["last_hit_at"])
+    op.create_index("ix_generation_cache_expires_at", "generation_cache", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_generation_cache_expires_at", table_name="generation_cache")
+    op.drop_index("ix_generation_cache_last_hit_at", table_name="generation_cache")
+    op.drop_table("generation_cache")
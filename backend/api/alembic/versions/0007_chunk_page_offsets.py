@@ -0,0 +1,32 @@
+"""chunk page and character offsets
+
+Revision ID: 0007_chunk_page_offsets
+Revises: 0006_generation_cache
+Create Date: 2026-10-17
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_chunk_page_offsets"
+down_revision = "0006_generation_cache"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("chunks", sa.Column("page", sa.Integer(), nullable=True))
+    op.add_column("chunks", sa.Column("char_start", sa.Integer(), nullable=True))
+    op.add_column("chunks", sa.Column("page_end", sa.Integer(), nullable=True))
+    op.add_column("chunks", sa.Column("char_end", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("chunks", "char_end")
+    op.drop_column("chunks", "page_end")
+    op.drop_column("chunks", "char_start")
+    op.drop_column("chunks", "page")
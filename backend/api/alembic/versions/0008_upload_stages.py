@@ -0,0 +1,43 @@
+"""per-stage checkpoints for upload ingestion
+
+Revision ID: 0008_upload_stages
+Revises: 0007_chunk_page_offsets
+Create Date: 2026-10-17
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0008_upload_stages"
+down_revision = "0007_chunk_page_offsets"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "upload_stages",
+        sa.Column(
+            "upload_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("uploads.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("name", sa.String(length=80), primary_key=True),
+        sa.Column("status", sa.Enum("running", "done", "failed", name="stage_status"), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("result_json", sa.JSON()),
+        sa.Column("error", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("upload_stages")
+    sa.Enum(name="stage_status").drop(op.get_bind(), checkfirst=True)
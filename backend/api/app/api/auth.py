@@ -3,7 +3,7 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from app.auth.deps import get_current_user
+from app.auth.deps import get_current_user, invalidate_user
 from app.auth.google import verify_google_id_token
 from app.auth.jwt import create_access_token
 from app.db import get_db
@@ -41,6 +41,7 @@ def auth_google(payload: AuthGoogleRequest, db: Session = Depends(get_db)) -> To
             changed = True
         if changed:
             db.commit()
+            invalidate_user(user.id)
 
     token = create_access_token(user_id=str(user.id))
     return TokenResponse(access_token=token)
@@ -1,41 +1,40 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
+import uuid
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-
-from app.auth.deps import get_current_user
-from app.db import get_db
-from app.models import Course, FeedEvent, FeedEventType, Quiz, User, UserProgress
-from app.schemas import QuizResultRequest, WatchEventRequest
+from starlette.concurrency import run_in_threadpool
+
+from app.auth.deps import get_current_user_id
+from app.config import settings
+from app.db import get_async_db, get_db
+from app.feed.queue import refresh_topic_detached
+from app.models import Course, FeedEvent, FeedEventType, Quiz, Reel, Topic
+from app.progress.scheduler import quiz_quality
+from app.progress.service import apply_mastery_delta, quiz_delta, watch_delta
+from app.schemas import EventBatchRequest, EventBatchResponse, QuizResultRequest, WatchEventRequest
+from app.telemetry.buffer import append_events
 
 router = APIRouter()
+async_router = APIRouter()
 
 
-def _schedule_next_review(mastery: float) -> datetime:
-    # Very lightweight spaced repetition schedule.
-    if mastery < 0.3:
-        delta = timedelta(days=1)
-    elif mastery < 0.7:
-        delta = timedelta(days=3)
-    else:
-        delta = timedelta(days=7)
-    return datetime.now(timezone.utc) + delta
-
-
-@router.post("/watch")
-def watch_event(
-    payload: WatchEventRequest,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
-) -> dict:
-    course = db.query(Course).filter(Course.id == payload.course_id, Course.user_id == user.id).one_or_none()
+def _owned_course(db: Session, user_id: uuid.UUID, course_id: uuid.UUID) -> Course:
+    course = db.query(Course).filter(Course.id == course_id, Course.user_id == user_id).one_or_none()
     if course is None:
         raise HTTPException(status_code=404, detail="Course not found")
+    return course
+
+
+def _record_watch(db: Session, user_id: uuid.UUID, payload: WatchEventRequest) -> None:
+    course = _owned_course(db, user_id, payload.course_id)
 
     event = FeedEvent(
-        user_id=user.id,
+        user_id=user_id,
         course_id=course.id,
         reel_id=payload.reel_id,
         topic_id=payload.topic_id,
@@ -47,42 +46,48 @@ def watch_event(
 
     # Small mastery nudge for watch time on a topic.
     if payload.topic_id and payload.event_type == "watch" and payload.watch_time_sec is not None:
-        up = (
-            db.query(UserProgress)
-            .filter(
-                UserProgress.user_id == user.id,
-                UserProgress.course_id == course.id,
-                UserProgress.topic_id == payload.topic_id,
-            )
-            .one_or_none()
-        )
-        if up is None:
-            up = UserProgress(user_id=user.id, course_id=course.id, topic_id=payload.topic_id, mastery_score=0.0)
-            db.add(up)
-        up.mastery_score = min(1.0, up.mastery_score + min(0.05, payload.watch_time_sec / 300.0))
-        up.last_seen_at = datetime.now(timezone.utc)
-        up.next_review_at = _schedule_next_review(up.mastery_score)
+        apply_mastery_delta(db, user_id, course.id, payload.topic_id, watch_delta(payload.watch_time_sec))
 
-    db.commit()
-    return {"ok": True}
 
+def _check_in_course(db: Session, model, pairs: list[tuple[uuid.UUID, uuid.UUID]], detail: str) -> None:
+    """Every (id, course_id) pair must name an existing `model` row of that course; one IN query."""
+    if not pairs:
+        return
+    found = dict(db.execute(select(model.id, model.course_id).where(model.id.in_({i for i, _ in pairs}))).all())
+    if any(found.get(i) != course_id for i, course_id in pairs):
+        raise HTTPException(status_code=404, detail=detail)
 
-@router.post("/quiz_result")
-def quiz_result(
-    payload: QuizResultRequest,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
-) -> dict:
-    course = db.query(Course).filter(Course.id == payload.course_id, Course.user_id == user.id).one_or_none()
-    if course is None:
+
+def _check_batch(db: Session, user_id: uuid.UUID, payload: EventBatchRequest) -> None:
+    course_ids = {e.course_id for e in payload.events}
+    owned = set(db.scalars(select(Course.id).where(Course.id.in_(course_ids), Course.user_id == user_id)))
+    if owned != course_ids:
         raise HTTPException(status_code=404, detail="Course not found")
 
+    # feed_events has FKs on reel and topic: an unknown id would fail the drain's bulk insert.
+    events = payload.events
+    _check_in_course(db, Reel, [(e.reel_id, e.course_id) for e in events if e.reel_id], "Reel not found")
+    _check_in_course(db, Topic, [(e.topic_id, e.course_id) for e in events if e.topic_id], "Topic not found")
+    _check_in_course(db, Quiz, [(e.quiz_id, e.course_id) for e in events if e.quiz_id], "Quiz not found")
+
+
+def _buffer_batch(user_id: uuid.UUID, payload: EventBatchRequest) -> EventBatchResponse:
+    try:
+        append_events(user_id, [e.model_dump(mode="json") for e in payload.events], settings.event_stream_maxlen)
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Event buffer unavailable")
+    return EventBatchResponse(accepted=len(payload.events))
+
+
+def _record_quiz_result(db: Session, user_id: uuid.UUID, payload: QuizResultRequest) -> dict:
+    course = _owned_course(db, user_id, payload.course_id)
+
     quiz = db.query(Quiz).filter(Quiz.id == payload.quiz_id, Quiz.course_id == course.id).one_or_none()
     if quiz is None:
         raise HTTPException(status_code=404, detail="Quiz not found")
 
     event = FeedEvent(
-        user_id=user.id,
+        user_id=user_id,
         course_id=course.id,
         reel_id=None,
         topic_id=payload.topic_id,
@@ -92,20 +97,92 @@ def quiz_result(
     )
     db.add(event)
 
-    up = (
-        db.query(UserProgress)
-        .filter(UserProgress.user_id == user.id, UserProgress.course_id == course.id, UserProgress.topic_id == payload.topic_id)
-        .one_or_none()
+    mastery_score, next_review_at = apply_mastery_delta(
+        db,
+        user_id,
+        course.id,
+        payload.topic_id,
+        quiz_delta(payload.correct),
+        quality=quiz_quality(payload.correct),
     )
-    if up is None:
-        up = UserProgress(user_id=user.id, course_id=course.id, topic_id=payload.topic_id, mastery_score=0.0)
-        db.add(up)
+    return {"ok": True, "mastery_score": mastery_score, "next_review_at": next_review_at}
 
-    up.mastery_score = min(1.0, up.mastery_score + (0.2 if payload.correct else -0.1))
-    up.mastery_score = max(0.0, up.mastery_score)
-    up.last_seen_at = datetime.now(timezone.utc)
-    up.next_review_at = _schedule_next_review(up.mastery_score)
 
+@router.post("/watch")
+def watch_event(
+    payload: WatchEventRequest,
+    background: BackgroundTasks,
+    db: Session = Depends(get_db),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+) -> dict:
+    _record_watch(db, user_id, payload)
+    db.commit()
+    background.add_task(refresh_topic_detached, user_id, payload.course_id, payload.topic_id)
+    return {"ok": True}
+
+
+@router.post("/batch", status_code=202, response_model=EventBatchResponse)
+def batch_events(
+    payload: EventBatchRequest,
+    db: Session = Depends(get_db),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+) -> EventBatchResponse:
+    """
+    Accept a batch of feed telemetry and buffer it on a Redis stream. A background consumer
+    (`worker.tasks.flush_feed_events`) bulk-inserts the events and folds mastery deltas.
+    """
+    _check_batch(db, user_id, payload)
+    return _buffer_batch(user_id, payload)
+
+
+@router.post("/quiz_result")
+def quiz_result(
+    payload: QuizResultRequest,
+    background: BackgroundTasks,
+    db: Session = Depends(get_db),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+) -> dict:
+    result = _record_quiz_result(db, user_id, payload)
     db.commit()
-    return {"ok": True, "mastery_score": up.mastery_score, "next_review_at": up.next_review_at}
+    background.add_task(refresh_topic_detached, user_id, payload.course_id, payload.topic_id)
+    return result
+
+
+# Async variants (settings.db_async). DB work runs on the AsyncSession; as in the sync
+# routes, the feed queue refresh runs after the response on its own session.
+
 
+@async_router.post("/watch")
+async def watch_event_async(
+    payload: WatchEventRequest,
+    background: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+) -> dict:
+    await db.run_sync(_record_watch, user_id, payload)
+    await db.commit()
+    background.add_task(refresh_topic_detached, user_id, payload.course_id, payload.topic_id)
+    return {"ok": True}
+
+
+@async_router.post("/batch", status_code=202, response_model=EventBatchResponse)
+async def batch_events_async(
+    payload: EventBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+) -> EventBatchResponse:
+    await db.run_sync(_check_batch, user_id, payload)
+    return await run_in_threadpool(_buffer_batch, user_id, payload)
+
+
+@async_router.post("/quiz_result")
+async def quiz_result_async(
+    payload: QuizResultRequest,
+    background: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+) -> dict:
+    result = await db.run_sync(_record_quiz_result, user_id, payload)
+    await db.commit()
+    background.add_task(refresh_topic_detached, user_id, payload.course_id, payload.topic_id)
+    return result
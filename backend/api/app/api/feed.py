@@ -1,67 +1,127 @@
 from __future__ import annotations
 
+import base64
+import json
+import logging
 import uuid
+from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from redis.exceptions import RedisError
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.auth.deps import get_current_user
-from app.db import get_db
-from app.models import Course, Quiz, Reel, Topic, User, UserProgress
+from app.auth.deps import get_current_user_id
+from app.config import settings
+from app.db import get_async_db, get_db
+from app.feed.queue import pop_reels, rebuild_queue, store_queue
+from app.feed.ranking import pick_quiz, rank_reels
+from app.models import Course, Reel
 from app.schemas import FeedResponse, QuizResponse, ReelResponse
-from app.storage.s3 import presign_get_url
+from app.storage.s3 import presign_get_url_cached
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
+async_router = APIRouter()
 
 
-@router.get("", response_model=FeedResponse)
-def get_feed(
-    course_id: uuid.UUID = Query(...),
-    limit: int = Query(5, ge=1, le=20),
-    topic_ids: str | None = Query(None, description="Comma-separated topic UUIDs"),
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+def _encode_cursor(data: dict) -> str:
+    raw = json.dumps(data, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> dict:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(data, dict):
+            raise ValueError("cursor is not an object")
+        return data
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# Ranked pages are popped from the per-user queue, so "next page" carries no position.
+RANKED_CURSOR = _encode_cursor({"q": "ranked"})
+
+
+def _reel_response(reel_id, topic_id, video_object_key: str, captions_vtt: str | None, duration_sec: int) -> ReelResponse:
+    return ReelResponse(
+        id=reel_id,
+        topic_id=topic_id,
+        video_url=presign_get_url_cached(video_object_key),
+        captions_vtt=captions_vtt,
+        duration_sec=duration_sec,
+    )
+
+
+def _ranked_response(page) -> FeedResponse:
+    if page is None:
+        return FeedResponse(reels=[], quiz=None)
+
+    reels, upcoming, quiz, remaining = page
+    return FeedResponse(
+        reels=[
+            _reel_response(r["id"], r["topic_id"], r["video_object_key"], r["captions_vtt"], r["duration_sec"])
+            for r in reels
+        ],
+        quiz=QuizResponse(**quiz) if quiz else None,
+        # The page that drains the queue is the last one: the client starts over without a cursor.
+        next_cursor=RANKED_CURSOR if remaining else None,
+        prefetch_urls=[presign_get_url_cached(r["video_object_key"]) for r in upcoming],
+    )
+
+
+def _ranked_page(
+    db: Session, user_id: uuid.UUID, course_id: uuid.UUID, limit: int, prefetch: int, rebuild: bool
 ) -> FeedResponse:
-    course = db.query(Course).filter(Course.id == course_id, Course.user_id == user.id).one_or_none()
-    if course is None:
-        raise HTTPException(status_code=404, detail="Course not found")
+    # Only a first page (no cursor) rebuilds the queue; continuing past its end would
+    # serve the already-seen reels again.
+    page = pop_reels(user_id, course_id, limit, peek=prefetch)
+    if page is None and rebuild and rebuild_queue(db, user_id, course_id):
+        page = pop_reels(user_id, course_id, limit, peek=prefetch)
+    return _ranked_response(page)
+
+
+async def _ranked_page_async(
+    db: AsyncSession, user_id: uuid.UUID, course_id: uuid.UUID, limit: int, prefetch: int, rebuild: bool
+) -> FeedResponse:
+    # Redis calls are blocking, so they run in the threadpool; DB work stays on the event loop.
+    page = await run_in_threadpool(pop_reels, user_id, course_id, limit, prefetch)
+    if page is None and rebuild:
+        ranked = await db.run_sync(rank_reels, user_id, course_id)
+        quiz = await db.run_sync(pick_quiz, user_id, course_id)
+        if await run_in_threadpool(store_queue, user_id, course_id, ranked, quiz):
+            page = await run_in_threadpool(pop_reels, user_id, course_id, limit, prefetch)
+    return _ranked_response(page)
 
-    topic_filter: set[uuid.UUID] | None = None
-    if topic_ids:
-        topic_filter = {uuid.UUID(t.strip()) for t in topic_ids.split(",") if t.strip()}
 
-    q = db.query(Reel).filter(Reel.course_id == course.id).order_by(Reel.created_at.desc())
+def _recent_page(
+    db: Session,
+    user_id: uuid.UUID,
+    course_id: uuid.UUID,
+    limit: int,
+    prefetch: int,
+    topic_filter: set[uuid.UUID] | None,
+    after: dict | None,
+) -> FeedResponse:
+    # Keyset pagination on (created_at, id), served by ix_reels_course_created_id.
+    q = db.query(Reel).filter(Reel.course_id == course_id).order_by(Reel.created_at.desc(), Reel.id.desc())
     if topic_filter:
         q = q.filter(Reel.topic_id.in_(topic_filter))
-    reels = q.limit(limit).all()
-
-    reel_responses = [
-        ReelResponse(
-            id=r.id,
-            topic_id=r.topic_id,
-            video_url=presign_get_url(r.video_object_key),
-            captions_vtt=r.captions_vtt,
-            duration_sec=r.duration_sec,
-        )
-        for r in reels
-    ]
-
-    # Choose a quiz for a due/weak topic (simple heuristic)
-    quiz_obj = None
-    progress = (
-        db.query(UserProgress)
-        .filter(UserProgress.user_id == user.id, UserProgress.course_id == course.id)
-        .order_by(UserProgress.mastery_score.asc())
-        .first()
-    )
-    if progress is not None:
-        quiz_obj = (
-            db.query(Quiz)
-            .filter(Quiz.course_id == course.id, Quiz.topic_id == progress.topic_id)
-            .order_by(Quiz.created_at.desc())
-            .first()
-        )
+    if after:
+        try:
+            after_t, after_id = datetime.fromisoformat(after["t"]), uuid.UUID(after["id"])
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        q = q.filter(tuple_(Reel.created_at, Reel.id) < tuple_(after_t, after_id))
+    rows = q.limit(limit + max(prefetch, 1)).all()
+    reels = rows[:limit]
+    upcoming = rows[limit:]
 
+    quiz_obj = pick_quiz(db, user_id, course_id)
     quiz_response = None
     if quiz_obj is not None:
         quiz_response = QuizResponse(
@@ -71,5 +131,73 @@ def get_feed(
             choices=quiz_obj.choices_json,
         )
 
-    return FeedResponse(reels=reel_responses, quiz=quiz_response)
+    return FeedResponse(
+        reels=[_reel_response(r.id, r.topic_id, r.video_object_key, r.captions_vtt, r.duration_sec) for r in reels],
+        quiz=quiz_response,
+        next_cursor=(
+            _encode_cursor({"t": reels[-1].created_at.isoformat(), "id": str(reels[-1].id)}) if upcoming else None
+        ),
+        prefetch_urls=[presign_get_url_cached(r.video_object_key) for r in upcoming[:prefetch]],
+    )
+
+
+def _parse_feed_query(topic_ids: str | None, cursor: str | None) -> tuple[set[uuid.UUID] | None, dict | None, bool]:
+    topic_filter: set[uuid.UUID] | None = None
+    if topic_ids:
+        topic_filter = {uuid.UUID(t.strip()) for t in topic_ids.split(",") if t.strip()}
+
+    after = _decode_cursor(cursor) if cursor else None
+    ranked = after is None or after.get("q") == "ranked"
+    # Ranked feed: pop from the precomputed per-user queue (see app.feed.queue).
+    # Topic-filtered and keyset-cursor requests use the chronological feed.
+    use_queue = ranked and settings.feed_ranking_enabled and not topic_filter
+    return topic_filter, None if ranked else after, use_queue
+
+
+@router.get("", response_model=FeedResponse)
+def get_feed(
+    course_id: uuid.UUID = Query(...),
+    limit: int = Query(5, ge=1, le=20),
+    topic_ids: str | None = Query(None, description="Comma-separated topic UUIDs"),
+    cursor: str | None = Query(None, description="Opaque `next_cursor` from the previous page"),
+    prefetch: int = Query(3, ge=0, le=10, description="Video URLs of the following reels to return as hints"),
+    db: Session = Depends(get_db),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+) -> FeedResponse:
+    course = db.query(Course).filter(Course.id == course_id, Course.user_id == user_id).one_or_none()
+    if course is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    topic_filter, after, use_queue = _parse_feed_query(topic_ids, cursor)
+    if use_queue:
+        try:
+            return _ranked_page(db, user_id, course.id, limit, prefetch, rebuild=cursor is None)
+        except RedisError:
+            logger.warning("ranked feed unavailable; serving recent reels", exc_info=True)
+
+    return _recent_page(db, user_id, course.id, limit, prefetch, topic_filter, after)
+
+
+@async_router.get("", response_model=FeedResponse)
+async def get_feed_async(
+    course_id: uuid.UUID = Query(...),
+    limit: int = Query(5, ge=1, le=20),
+    topic_ids: str | None = Query(None, description="Comma-separated topic UUIDs"),
+    cursor: str | None = Query(None, description="Opaque `next_cursor` from the previous page"),
+    prefetch: int = Query(3, ge=0, le=10, description="Video URLs of the following reels to return as hints"),
+    db: AsyncSession = Depends(get_async_db),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+) -> FeedResponse:
+    """`get_feed` for `settings.db_async`: same contract, no threadpool slot held across DB I/O."""
+    course = await db.scalar(select(Course).where(Course.id == course_id, Course.user_id == user_id))
+    if course is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    topic_filter, after, use_queue = _parse_feed_query(topic_ids, cursor)
+    if use_queue:
+        try:
+            return await _ranked_page_async(db, user_id, course.id, limit, prefetch, rebuild=cursor is None)
+        except RedisError:
+            logger.warning("ranked feed unavailable; serving recent reels", exc_info=True)
 
+    return await db.run_sync(_recent_page, user_id, course.id, limit, prefetch, topic_filter, after)
@@ -8,7 +8,8 @@ from sqlalchemy.orm import Session
 from app.auth.deps import get_current_user
 from app.db import get_db
 from app.models import Course, User, UserProgress
-from app.schemas import ProgressItemResponse, ProgressResponse
+from app.progress.scheduler import due_now
+from app.schemas import DueReviewResponse, DueReviewsResponse, ProgressItemResponse, ProgressResponse
 
 router = APIRouter()
 
@@ -41,3 +42,26 @@ def get_progress(
         ],
     )
 
+
+@router.get("/due", response_model=DueReviewsResponse)
+def get_due_reviews(
+    course_id: uuid.UUID | None = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> DueReviewsResponse:
+    """Topics due for review now (optionally for one course), most overdue first."""
+    items = due_now(db, user.id, course_id=course_id, limit=limit)
+    return DueReviewsResponse(
+        items=[
+            DueReviewResponse(
+                course_id=i.course_id,
+                topic_id=i.topic_id,
+                mastery_score=i.mastery_score,
+                next_review_at=i.next_review_at,
+                interval_days=i.interval_days,
+                repetitions=i.repetitions,
+            )
+            for i in items
+        ]
+    )
@@ -10,7 +10,7 @@ from app.config import settings
 from app.db import get_db
 from app.models import Course, Upload, UploadStatus, UploadType, User
 from app.schemas import UploadCreateResponse, UploadProcessResponse
-from app.storage.s3 import put_object
+from app.storage.blobs import store_blob
 
 router = APIRouter()
 
@@ -27,15 +27,14 @@ def create_upload(
     if course is None:
         raise HTTPException(status_code=404, detail="Course not found")
 
-    ext = (file.filename or "").split(".")[-1].lower() if file.filename else ""
-    key = f"uploads/{course_id}/{uuid.uuid4()}.{ext or 'bin'}"
-    data = file.file.read()
-    put_object(object_key=key, data=data, content_type=file.content_type or "application/octet-stream")
+    # Content-addressed: identical files (e.g. a shared syllabus) are stored once.
+    blob = store_blob(db, file.file, file.content_type or "application/octet-stream")
 
     upload = Upload(
         course_id=course.id,
         type=type,
-        object_key=key,
+        object_key=blob.object_key,
+        content_sha256=blob.sha256,
         original_filename=file.filename,
         status=UploadStatus.uploaded,
         metadata_json={"content_type": file.content_type},
@@ -4,28 +4,57 @@ import uuid
 
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from app.auth.jwt import decode_access_token
+from app.cache import make_cache
+from app.config import settings
 from app.db import get_db
 from app.models import User
 
 security = HTTPBearer()
 
+# Keyed by the token `sub` (the user id). Values are plain column snapshots so the
+# Redis backend can share them across API processes.
+_user_cache = make_cache("user", settings.user_cache_size, settings.user_cache_backend)
+_USER_FIELDS = ("email", "name", "auth_provider", "provider_sub")
 
-def get_current_user(
-    creds: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    token = creds.credentials
+
+def _snapshot(user: User) -> dict:
+    return {"id": str(user.id), **{f: getattr(user, f) for f in _USER_FIELDS}}
+
+
+def _from_snapshot(data: dict) -> User:
+    # Detached (not transient): adding it to a session must never INSERT a duplicate user.
+    user = User(id=uuid.UUID(data["id"]), **{f: data.get(f) for f in _USER_FIELDS})
+    make_transient_to_detached(user)
+    return user
+
+
+def invalidate_user(user_id: uuid.UUID) -> None:
+    """Drop a cached user after its profile changes."""
+    _user_cache.delete(str(user_id))
+
+
+async def get_current_user_id(creds: HTTPAuthorizationCredentials = Depends(security)) -> uuid.UUID:
+    """Claims-only auth: the verified token `sub`, without touching the database."""
     try:
-        payload = decode_access_token(token)
-        user_id = uuid.UUID(payload["sub"])
+        payload = decode_access_token(creds.credentials)
+        return uuid.UUID(payload["sub"])
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+
+def get_current_user(
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+) -> User:
+    cached = _user_cache.get(str(user_id))
+    if cached is not None:
+        return _from_snapshot(cached)
+
     user = db.query(User).filter(User.id == user_id).one_or_none()
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
+    _user_cache.set(str(user_id), _snapshot(user), settings.user_cache_ttl_sec)
     return user
-
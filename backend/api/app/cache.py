@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis_lock = threading.Lock()
+_redis_client = None
+
+
+def get_redis():
+    """Shared Redis client (connection-pooled, thread-safe) for caches and queues."""
+    global _redis_client
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                import redis
+
+                _redis_client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+    return _redis_client
+
+
+class Cache(Protocol):
+    def get(self, key: str) -> Any | None: ...
+
+    def set(self, key: str, value: Any, ttl: float) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+class TTLCache:
+    """In-process LRU cache with per-entry TTL. Thread-safe; bounded to `maxsize` entries."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = max(1, int(maxsize))
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class RedisTTLCache:
+    """
+    Redis-backed cache shared across processes. Values are stored as JSON.
+    Redis errors degrade to cache misses so callers fall back to the source of truth.
+    """
+
+    def __init__(self, namespace: str) -> None:
+        self.namespace = namespace
+
+    def _key(self, key: str) -> str:
+        return f"doomlearn:{self.namespace}:{key}"
+
+    def get(self, key: str) -> Any | None:
+        try:
+            raw = get_redis().get(self._key(key))
+        except Exception:
+            logger.warning("redis cache get failed (%s)", self.namespace, exc_info=True)
+            return None
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        try:
+            get_redis().set(self._key(key), json.dumps(value, default=str), ex=max(1, int(ttl)))
+        except Exception:
+            logger.warning("redis cache set failed (%s)", self.namespace, exc_info=True)
+
+    def delete(self, key: str) -> None:
+        try:
+            get_redis().delete(self._key(key))
+        except Exception:
+            logger.warning("redis cache delete failed (%s)", self.namespace, exc_info=True)
+
+
+class NullCache:
+    def get(self, key: str) -> Any | None:
+        return None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+
+def make_cache(namespace: str, maxsize: int, backend: str) -> Cache:
+    backend = (backend or "memory").lower()
+    if backend == "memory":
+        return TTLCache(maxsize)
+    if backend == "redis":
+        return RedisTTLCache(namespace)
+    if backend == "none":
+        return NullCache()
+    raise RuntimeError(f"Unknown cache backend {backend!r} for {namespace}; use memory|redis|none")
@@ -17,6 +17,12 @@ class Settings(BaseSettings):
     postgres_db: str = "doomlearn"
     postgres_user: str = "doomlearn"
     postgres_password: str = "doomlearn"
+    db_async: bool = False  # serve /feed and /events from async routes on an AsyncSession
+    # Per-process connection pool: size it to the process's concurrent DB users (API threads,
+    # or the worker's --concurrency with --pool=threads), or checkouts time out.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_sec: float = 30.0
 
     # Redis/Celery
     redis_url: str = "redis://localhost:6379/0"
@@ -28,6 +34,13 @@ class Settings(BaseSettings):
     s3_secret_access_key: str = "minioadmin"
     s3_bucket: str = "doomlearn"
     s3_public_base_url: str = "http://localhost:9000/doomlearn"
+    s3_max_pool_connections: int = 50
+    s3_tcp_keepalive: bool = True
+    s3_multipart_chunk_mb: int = 16
+    s3_transfer_concurrency: int = 4
+    presign_cache_backend: str = "memory"  # memory|redis|none
+    presign_cache_size: int = 10000
+    presign_min_remaining_sec: int = 900
 
     # Auth / JWT
     jwt_secret: str = "dev-change-me"
@@ -35,15 +48,79 @@ class Settings(BaseSettings):
     jwt_audience: str = "doomlearn-mobile"
     auth_mock: bool = True
     google_client_id: str | None = None
+    user_cache_backend: str = "memory"  # memory|redis|none
+    user_cache_size: int = 10000
+    user_cache_ttl_sec: int = 300
 
     # MiniMax
     minimax_base_url: str = "https://api.minimax.chat"
     minimax_api_key: str | None = None
     minimax_mock: bool = True
+    minimax_timeout_sec: float = 60.0
+    minimax_connect_timeout_sec: float = 5.0
+    minimax_max_connections: int = 20
+    minimax_max_retries: int = 4
+    minimax_backoff_base_sec: float = 0.5
+    minimax_backoff_max_sec: float = 20.0
+    minimax_rate_per_sec: float = 5.0  # shared across processes via Redis; 0 = unlimited
+    minimax_burst: int = 10
+
+    # Reel composition (app.media.compose)
+    reel_burn_captions: bool = True
+    reel_music_enabled: bool = False
+    reel_music_mood: str = "calm"
+    reel_music_volume: float = 0.15
+    ffmpeg_preset: str = "veryfast"
+    ffmpeg_crf: int = 23
+    ffmpeg_threads: int = 0
+    ffmpeg_audio_bitrate: str = "128k"
+
+    # Clip reels cut from video uploads by transcript timestamps (app.media.clips)
+    reel_clip_enabled: bool = True
+    clip_max_keyframe_drift_sec: float = 2.0  # further than this from a keyframe -> transcode
+    clip_merge_gap_sec: float = 2.0
+    clip_min_sec: float = 3.0
+
+    # Generation cache (MiniMax outputs keyed by input hash; see app.generation_cache)
+    generation_cache_enabled: bool = True
+    generation_cache_ttl_days: int = 30
+    generation_cache_max_entries: int = 100_000
+
+    # Feed ranking (per-user queues in Redis)
+    feed_ranking_enabled: bool = True
+    feed_queue_ttl_sec: int = 3600
+
+    # Event telemetry buffer (Redis stream -> worker.tasks.flush_feed_events)
+    event_stream_maxlen: int = 1_000_000
+    event_flush_batch_size: int = 1000
+    event_flush_interval_sec: float = 2.0
 
     # Embeddings/RAG
     embeddings_mode: str = "mock"  # mock|local
+    embeddings_local_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embeddings_batch_size: int = 64
     vector_dim: int = 384
+    chunk_insert_batch_size: int = 500
+    chunk_target_tokens: int = 180
+    chunk_overlap_tokens: int = 24
+    pdf_extract_workers: int = 0  # 0/1 = extract in-process
+    pdf_pages_per_task: int = 16
+    asr_mode: str = "mock"  # mock|local
+    asr_local_model: str = "base"  # faster-whisper model size or path
+    asr_compute_type: str = "int8"
+    asr_language: str = ""  # empty = auto-detect
+    asr_window_sec: float = 30.0
+    asr_workers: int = 0  # 0/1 = transcribe in-process
+    # Celery: late-acked tasks are redelivered after this long, so it must exceed the longest task.
+    celery_visibility_timeout_sec: int = 4 * 3600
+    # Task-level retries of transient failures; checkpointed stages are not redone.
+    task_max_retries: int = 5
+    task_retry_backoff_sec: float = 10.0
+    task_retry_backoff_max_sec: float = 600.0
+    retrieval_mode: str = "exact"  # exact|approximate
+    retrieval_ef_search: int = 40  # HNSW
+    retrieval_probes: int = 10  # IVFFlat
+    retrieval_iterative_scan: bool = False  # pgvector >= 0.8
 
     @property
     def database_url(self) -> str:
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.cache import get_redis
+from app.config import settings
+from app.db import SessionLocal
+from app.feed.ranking import RankedReel, pick_quiz, rank_reels
+
+logger = logging.getLogger(__name__)
+
+# Per (user, course):
+#   <prefix>            ZSET  reel_id -> score (pop order = highest score first)
+#   <prefix>:items      HASH  reel_id -> reel JSON (everything /feed needs, no ORM round trip)
+#   <prefix>:quiz       STR   quiz JSON (or "null")
+
+
+def _prefix(user_id: uuid.UUID, course_id: uuid.UUID) -> str:
+    return f"doomlearn:feedq:{user_id}:{course_id}"
+
+
+def _reel_payload(reel) -> str:
+    return json.dumps(
+        {
+            "id": str(reel.id),
+            "topic_id": str(reel.topic_id),
+            "video_object_key": reel.video_object_key,
+            "captions_vtt": reel.captions_vtt,
+            "duration_sec": reel.duration_sec,
+        }
+    )
+
+
+def _quiz_payload(quiz) -> str:
+    if quiz is None:
+        return "null"
+    return json.dumps(
+        {
+            "id": str(quiz.id),
+            "topic_id": str(quiz.topic_id),
+            "question": quiz.question,
+            "choices": quiz.choices_json,
+        }
+    )
+
+
+def rebuild_queue(db: Session, user_id: uuid.UUID, course_id: uuid.UUID) -> int:
+    """Rank every reel of the course and materialize the queue. Returns the queue length."""
+    return store_queue(user_id, course_id, rank_reels(db, user_id, course_id), pick_quiz(db, user_id, course_id))
+
+
+def store_queue(user_id: uuid.UUID, course_id: uuid.UUID, ranked: list[RankedReel], quiz) -> int:
+    """Replace the queue with an already ranked reel list (Redis only; no DB access)."""
+    key = _prefix(user_id, course_id)
+    ttl = int(settings.feed_queue_ttl_sec)
+    pipe = get_redis().pipeline(transaction=True)
+    pipe.delete(key, f"{key}:items")
+    if ranked:
+        pipe.zadd(key, {str(rr.reel.id): rr.score for rr in ranked})
+        pipe.hset(f"{key}:items", mapping={str(rr.reel.id): _reel_payload(rr.reel) for rr in ranked})
+        pipe.expire(key, ttl)
+        pipe.expire(f"{key}:items", ttl)
+    pipe.set(f"{key}:quiz", _quiz_payload(quiz), ex=ttl)
+    pipe.execute()
+    return len(ranked)
+
+
+def pop_reels(
+    user_id: uuid.UUID, course_id: uuid.UUID, n: int, peek: int = 0
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], dict[str, Any] | None, int] | None:
+    """
+    Pop the `n` best reels and peek at the following `peek` ones; the last item is the
+    number of reels still queued after this pop.
+    Returns None when the queue is missing or drained (caller rebuilds it).
+    """
+    key = _prefix(user_id, course_id)
+    r = get_redis()
+    pipe = r.pipeline(transaction=True)
+    pipe.zpopmax(key, n)
+    if peek:
+        pipe.zrevrange(key, 0, peek - 1)
+    pipe.zcard(key)
+    pipe.get(f"{key}:quiz")
+    res = pipe.execute()
+    popped = [member for member, _ in res[0]]
+    upcoming = res[1] if peek else []
+    remaining, quiz_raw = res[-2], res[-1]
+    if not popped:
+        return None
+
+    ids = popped + upcoming
+    payloads = r.hmget(f"{key}:items", ids)
+    items = [json.loads(p) for p in payloads if p]
+    by_id = {i["id"]: i for i in items}
+    quiz = json.loads(quiz_raw) if quiz_raw else None
+    return (
+        [by_id[i] for i in popped if i in by_id],
+        [by_id[i] for i in upcoming if i in by_id],
+        quiz,
+        remaining,
+    )
+
+
+def refresh_topic(db: Session, user_id: uuid.UUID, course_id: uuid.UUID, topic_id: uuid.UUID | None) -> None:
+    """
+    Incremental refresh after an event: re-score the topic's reels that are still queued
+    (ZADD XX leaves already-served reels out until the next rebuild) and re-pick the quiz.
+    Best effort: a Redis failure only means the queue is refreshed at its next rebuild.
+    """
+    if not settings.feed_ranking_enabled:
+        return
+    key = _prefix(user_id, course_id)
+    try:
+        r = get_redis()
+        if not r.exists(key):
+            return
+        ranked = rank_reels(db, user_id, course_id, topic_id=topic_id) if topic_id else []
+        quiz = pick_quiz(db, user_id, course_id)
+        pipe = r.pipeline(transaction=True)
+        if ranked:
+            pipe.zadd(key, {str(rr.reel.id): rr.score for rr in ranked}, xx=True)
+        pipe.set(f"{key}:quiz", _quiz_payload(quiz), keepttl=True)
+        pipe.execute()
+    except Exception:
+        logger.warning("feed queue refresh failed for user=%s course=%s", user_id, course_id, exc_info=True)
+
+
+def refresh_topic_detached(user_id: uuid.UUID, course_id: uuid.UUID, topic_id: uuid.UUID | None) -> None:
+    """`refresh_topic` on its own session, for background tasks that outlive the request's session."""
+    with SessionLocal() as db:
+        refresh_topic(db, user_id, course_id, topic_id)
+
+
+def invalidate_course(user_id: uuid.UUID, course_id: uuid.UUID) -> None:
+    """Drop the queue (e.g. after new reels are generated); the next /feed rebuilds it."""
+    key = _prefix(user_id, course_id)
+    try:
+        get_redis().delete(key, f"{key}:items", f"{key}:quiz")
+    except Exception:
+        logger.warning("feed queue invalidation failed for user=%s course=%s", user_id, course_id, exc_info=True)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import math
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.models import FeedEvent, FeedEventType, Quiz, Reel, UserProgress
+
+# Score weights. Due/weak topics push a reel up; recent watches and skips push it down.
+W_DUE = 1.0
+W_WEAK = 0.8
+W_RECENT = 1.2
+W_SKIP = 0.6
+RECENT_HALF_LIFE_HOURS = 12.0
+
+
+@dataclass(frozen=True)
+class RankedReel:
+    reel: Reel
+    score: float
+
+
+def topic_priority(now: datetime, progress: UserProgress | None) -> float:
+    """How much a topic needs review: overdue-ness (sigmoid over days) plus mastery weakness."""
+    if progress is None:
+        # Never seen: treat as due and unlearned.
+        return W_DUE + W_WEAK
+    if progress.next_review_at is None:
+        due = 0.5
+    else:
+        overdue_days = (now - progress.next_review_at).total_seconds() / 86400.0
+        due = 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, overdue_days))))
+    weakness = 1.0 - max(0.0, min(1.0, progress.mastery_score or 0.0))
+    return W_DUE * due + W_WEAK * weakness
+
+
+def score_reel(
+    now: datetime,
+    progress: UserProgress | None,
+    last_watched_at: datetime | None,
+    skips: int,
+) -> float:
+    score = topic_priority(now, progress)
+    if last_watched_at is not None:
+        hours = max(0.0, (now - last_watched_at).total_seconds() / 3600.0)
+        score -= W_RECENT * 0.5 ** (hours / RECENT_HALF_LIFE_HOURS)
+    if skips:
+        score -= W_SKIP * (1.0 - 0.5**skips)
+    return score
+
+
+def _load_progress(db: Session, user_id: uuid.UUID, course_id: uuid.UUID) -> dict[uuid.UUID, UserProgress]:
+    rows = db.scalars(
+        select(UserProgress).where(UserProgress.user_id == user_id, UserProgress.course_id == course_id)
+    )
+    return {p.topic_id: p for p in rows}
+
+
+def _load_engagement(
+    db: Session, user_id: uuid.UUID, course_id: uuid.UUID, reel_ids: list[uuid.UUID] | None = None
+) -> dict[uuid.UUID, tuple[datetime | None, int]]:
+    watched = FeedEvent.event_type.in_([FeedEventType.watch, FeedEventType.replay])
+    q = (
+        select(
+            FeedEvent.reel_id,
+            func.max(case((watched, FeedEvent.created_at))),
+            func.count().filter(FeedEvent.event_type == FeedEventType.skip),
+        )
+        .where(FeedEvent.user_id == user_id, FeedEvent.course_id == course_id, FeedEvent.reel_id.is_not(None))
+        .group_by(FeedEvent.reel_id)
+    )
+    if reel_ids is not None:
+        # One topic's reels: only their events, not the user's whole course history.
+        q = q.where(FeedEvent.reel_id.in_(reel_ids))
+    rows = db.execute(q)
+    return {reel_id: (last_watched_at, int(skips or 0)) for reel_id, last_watched_at, skips in rows}
+
+
+def rank_reels(
+    db: Session,
+    user_id: uuid.UUID,
+    course_id: uuid.UUID,
+    topic_id: uuid.UUID | None = None,
+) -> list[RankedReel]:
+    """Score every reel of a course (or of one topic) for a user, best first."""
+    now = datetime.now(timezone.utc)
+    q = select(Reel).where(Reel.course_id == course_id)
+    if topic_id is not None:
+        q = q.where(Reel.topic_id == topic_id)
+    reels = list(db.scalars(q))
+    if not reels:
+        return []
+
+    progress = _load_progress(db, user_id, course_id)
+    engagement = _load_engagement(db, user_id, course_id, [r.id for r in reels] if topic_id is not None else None)
+
+    ranked = []
+    for r in reels:
+        last_watched_at, skips = engagement.get(r.id, (None, 0))
+        ranked.append(RankedReel(reel=r, score=score_reel(now, progress.get(r.topic_id), last_watched_at, skips)))
+    ranked.sort(key=lambda rr: (rr.score, rr.reel.created_at), reverse=True)
+    return ranked
+
+
+def pick_quiz(db: Session, user_id: uuid.UUID, course_id: uuid.UUID) -> Quiz | None:
+    """Latest quiz of the topic with the highest review priority (among topics that have quizzes)."""
+    now = datetime.now(timezone.utc)
+    progress = _load_progress(db, user_id, course_id)
+    quizzes = db.scalars(
+        select(Quiz)
+        .where(Quiz.course_id == course_id)
+        .distinct(Quiz.topic_id)
+        .order_by(Quiz.topic_id, Quiz.created_at.desc())
+    )
+    best: tuple[float, Quiz] | None = None
+    for quiz in quizzes:
+        priority = topic_priority(now, progress.get(quiz.topic_id))
+        if best is None or priority > best[0]:
+            best = (priority, quiz)
+    return best[1] if best else None
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.cache import get_redis
+from app.config import settings
+from app.db import SessionLocal
+from app.models import GenerationCacheEntry
+from app.storage.s3 import delete_objects, upload_file
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate every entry when prompt templates or output handling change.
+CACHE_VERSION = 1
+METRICS_KEY = "doomlearn:metrics:generation_cache"
+# Provider media that reels are composed from. No reel points at these objects, so evicting
+# the entry deletes the object too.
+INTERMEDIATE_KINDS = {"tts", "video", "music"}
+
+
+def cache_key(kind: str, payload: dict[str, Any]) -> str:
+    """Canonical hash of a generation request: key order and whitespace never change the key."""
+    canonical = json.dumps(
+        {"v": CACHE_VERSION, "kind": kind, "mock": settings.minimax_mock, "payload": payload},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def media_key(kind: str, key: str, suffix: str) -> str:
+    return f"generated/{kind}/{key[:2]}/{key}{suffix}"
+
+
+def _count(kind: str, outcome: str) -> None:
+    # Best effort: metrics must never fail a generation.
+    try:
+        get_redis().hincrby(METRICS_KEY, f"{kind}:{outcome}", 1)
+    except Exception:
+        logger.debug("generation cache metrics unavailable", exc_info=True)
+
+
+def stats() -> dict[str, int]:
+    """Hit/miss counters per kind, e.g. {"llm:hit": 12, "llm:miss": 3}."""
+    return {k: int(v) for k, v in (get_redis().hgetall(METRICS_KEY) or {}).items()}
+
+
+def _lookup(key: str) -> dict | None:
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        value = db.scalar(
+            update(GenerationCacheEntry)
+            .where(GenerationCacheEntry.key == key, GenerationCacheEntry.expires_at > now)
+            .values(hit_count=GenerationCacheEntry.hit_count + 1, last_hit_at=now)
+            .returning(GenerationCacheEntry.value_json)
+        )
+        db.commit()
+    return value
+
+
+def _store(key: str, kind: str, value: dict) -> None:
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(days=settings.generation_cache_ttl_days)
+    stmt = pg_insert(GenerationCacheEntry.__table__).values(
+        key=key, kind=kind, value_json=value, hit_count=0, last_hit_at=now, expires_at=expires_at
+    )
+    with SessionLocal() as db:
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["key"],
+                set_={"value_json": stmt.excluded.value_json, "last_hit_at": now, "expires_at": expires_at},
+            )
+        )
+        db.commit()
+
+
+def cached_json(kind: str, payload: dict[str, Any], produce: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+    """
+    Return the cached JSON result for `payload`, or call `produce()` and cache it.
+    Entries are committed on their own session, so they survive a failure later in the task.
+    """
+    if not settings.generation_cache_enabled:
+        return produce()
+    key = cache_key(kind, payload)
+    value = _lookup(key)
+    if value is not None:
+        _count(kind, "hit")
+        return value
+    _count(kind, "miss")
+    value = produce()
+    _store(key, kind, value)
+    return value
+
+
+def cached_media(
+    kind: str,
+    payload: dict[str, Any],
+    produce: Callable[[], str],
+    suffix: str | None = None,
+    content_type: str | None = None,
+) -> str:
+    """
+    Return the S3 object key of the media generated for `payload`. On a miss, `produce()`
+    returns a local file path; the file is uploaded under a content-addressed key and removed.
+    `suffix` and `content_type` default to those of the produced file.
+    """
+    return cached_media_entry(kind, payload, lambda: (produce(), {}), suffix, content_type)["object_key"]
+
+
+def cached_media_entry(
+    kind: str,
+    payload: dict[str, Any],
+    produce: Callable[[], tuple[str, dict[str, Any]]],
+    suffix: str | None = None,
+    content_type: str | None = None,
+) -> dict[str, Any]:
+    """
+    `cached_media` for media with metadata: `produce()` returns (path, metadata) and the
+    metadata is cached with the object. Returns {"object_key": ..., **metadata}.
+    """
+    key = cache_key(kind, payload)
+    if settings.generation_cache_enabled:
+        value = _lookup(key)
+        if value is not None:
+            _count(kind, "hit")
+            return value
+        _count(kind, "miss")
+
+    path, meta = produce()
+    suffix = suffix if suffix is not None else os.path.splitext(path)[1]
+    content_type = content_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+    object_key = media_key(kind, key, suffix)
+    try:
+        upload_file(object_key=object_key, path=path, content_type=content_type)
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    value = {**meta, "object_key": object_key}
+    if settings.generation_cache_enabled:
+        _store(key, kind, value)
+    return value
+
+
+def prune(max_entries: int | None = None) -> int:
+    """
+    Evict expired entries, then the least recently hit ones beyond `max_entries` (LRU).
+    Reel and clip objects are left in S3 because reels keep pointing at them; the objects
+    of evicted intermediate media (INTERMEDIATE_KINDS) are deleted.
+    """
+    limit = int(max_entries or settings.generation_cache_max_entries)
+    now = datetime.now(timezone.utc)
+    evicted = GenerationCacheEntry.kind, GenerationCacheEntry.value_json
+    with SessionLocal() as db:
+        removed = list(
+            db.execute(delete(GenerationCacheEntry).where(GenerationCacheEntry.expires_at <= now).returning(*evicted))
+        )
+        cutoff = db.scalar(
+            select(GenerationCacheEntry.last_hit_at)
+            .order_by(GenerationCacheEntry.last_hit_at.desc())
+            .offset(limit)
+            .limit(1)
+        )
+        if cutoff is not None:
+            removed += db.execute(
+                delete(GenerationCacheEntry).where(GenerationCacheEntry.last_hit_at <= cutoff).returning(*evicted)
+            )
+        db.commit()
+
+    orphaned = [value["object_key"] for kind, value in removed if kind in INTERMEDIATE_KINDS and value]
+    if orphaned:
+        try:
+            delete_objects(orphaned)
+        except Exception:
+            logger.warning("could not delete %d evicted media objects", len(orphaned), exc_info=True)
+    return len(removed)
@@ -23,8 +23,9 @@ def create_app() -> FastAPI:
     app.include_router(auth.router, prefix="/auth", tags=["auth"])
     app.include_router(courses.router, prefix="/courses", tags=["courses"])
     app.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
-    app.include_router(feed.router, prefix="/feed", tags=["feed"])
-    app.include_router(events.router, prefix="/events", tags=["events"])
+    # The hot paths have async variants; everything else runs on the sync session either way.
+    app.include_router(feed.async_router if settings.db_async else feed.router, prefix="/feed", tags=["feed"])
+    app.include_router(events.async_router if settings.db_async else events.router, prefix="/events", tags=["events"])
     app.include_router(progress.router, prefix="/progress", tags=["progress"])
 
     @app.get("/health")
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import json
+import logging
+import subprocess
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.config import settings
+from app.media.compose import FPS, HEIGHT, WIDTH, EncodeOptions
+
+logger = logging.getLogger(__name__)
+
+# Codecs the mobile player handles in an MP4 as-is, so the source packets can be copied.
+COPY_VIDEO_CODECS = {"h264"}
+COPY_AUDIO_CODECS = {"aac", "mp3"}
+# ffmpeg reads the source straight from a presigned URL; only the byte ranges it needs are fetched.
+PROTOCOLS = "file,http,https,tcp,tls,crypto"
+
+
+class ClipError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class TimeRange:
+    start_sec: float
+    end_sec: float
+
+    @property
+    def duration_sec(self) -> float:
+        return self.end_sec - self.start_sec
+
+
+@dataclass(frozen=True)
+class GopCut:
+    """A range widened to whole GOPs for stream copy (see `_snap`)."""
+
+    start_sec: float  # keyframe pts: concat `inpoint`
+    end_sec: float  # next keyframe pts (or end of source): where the next piece starts playing
+    outpoint_sec: float | None  # next keyframe dts: concat ends a piece on decode timestamps
+
+
+@dataclass(frozen=True)
+class ClipReel:
+    path: Path
+    duration_sec: float  # as cut: stream-copied ranges are widened to whole GOPs
+
+
+@dataclass(frozen=True)
+class SourceInfo:
+    video_codec: str | None
+    audio_codec: str | None
+    duration_sec: float
+
+
+def _run(cmd: list[str]) -> str:
+    try:
+        proc = subprocess.run(cmd, check=True, capture_output=True)
+    except FileNotFoundError as e:
+        raise ClipError(f"{cmd[0]} not found; install ffmpeg to cut clip reels") from e
+    except subprocess.CalledProcessError as e:
+        stderr = (e.stderr or b"").decode("utf-8", "replace").strip()
+        raise ClipError(f"{cmd[0]} failed: {stderr[-500:]}") from e
+    return proc.stdout.decode("utf-8", "replace")
+
+
+def probe_source(source: str) -> SourceInfo:
+    cmd = ["ffprobe", "-v", "error", "-protocol_whitelist", PROTOCOLS]
+    cmd += ["-show_entries", "stream=codec_type,codec_name:format=duration", "-of", "json", source]
+    out = _run(cmd)
+    data = json.loads(out or "{}")
+    streams = data.get("streams") or []
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    if video is None:
+        raise ClipError("source has no video stream")
+    return SourceInfo(
+        video_codec=video.get("codec_name"),
+        audio_codec=audio.get("codec_name") if audio else None,
+        duration_sec=float((data.get("format") or {}).get("duration") or 0),
+    )
+
+
+def keyframes(source: str, lo: float, hi: float) -> list[tuple[float, float]]:
+    """(pts, dts) of the video keyframes with pts in [lo, hi], from packet flags (nothing is decoded)."""
+    cmd = ["ffprobe", "-v", "error", "-protocol_whitelist", PROTOCOLS, "-select_streams", "v:0"]
+    cmd += ["-read_intervals", f"{lo:.3f}%{hi + 0.001:.3f}"]
+    cmd += ["-show_entries", "packet=pts_time,dts_time,flags", "-of", "csv=p=0", source]
+    found = []
+    for line in _run(cmd).splitlines():
+        pts, dts, flags = (line.split(",") + ["", ""])[:3]
+        try:
+            pts_sec, dts_sec = float(pts), float(dts)
+        except ValueError:
+            continue
+        if "K" in flags and lo - 1e-3 <= pts_sec <= hi + 1e-3:
+            found.append((pts_sec, dts_sec))
+    return sorted(found)
+
+
+def _snap(source: str, r: TimeRange, drift_sec: float, duration_sec: float) -> GopCut | None:
+    """
+    Widen `r` to whole GOPs: start on the last keyframe at or before it and stop before the
+    first keyframe at or after it (or at the end of the source), so copied pieces join cleanly.
+    None when a keyframe is further than `drift_sec` away.
+    """
+    before = keyframes(source, max(0.0, r.start_sec - drift_sec), r.start_sec)
+    if not before:
+        return None
+    start = before[-1][0]
+    if duration_sec > 0 and r.end_sec >= duration_sec - 1e-3:
+        return GopCut(start, duration_sec, None)
+    after = keyframes(source, r.end_sec, r.end_sec + drift_sec)
+    if not after:
+        return None
+    return GopCut(start, after[0][0], after[0][1])
+
+
+def _join_cuts(cuts: Iterable[GopCut]) -> list[GopCut]:
+    # Widening can make neighbouring cuts overlap; play the shared GOPs once.
+    joined: list[GopCut] = []
+    for c in sorted(cuts, key=lambda c: c.start_sec):
+        if joined and c.start_sec < joined[-1].end_sec:
+            if c.end_sec > joined[-1].end_sec:
+                joined[-1] = GopCut(joined[-1].start_sec, c.end_sec, c.outpoint_sec)
+        else:
+            joined.append(c)
+    return joined
+
+
+def _merge(ranges: Iterable[TimeRange], gap_sec: float) -> list[TimeRange]:
+    merged: list[TimeRange] = []
+    for r in sorted(ranges, key=lambda r: r.start_sec):
+        if merged and r.start_sec <= merged[-1].end_sec + gap_sec:
+            merged[-1] = TimeRange(merged[-1].start_sec, max(merged[-1].end_sec, r.end_sec))
+        else:
+            merged.append(r)
+    return merged
+
+
+def _total(ranges: Iterable[TimeRange]) -> float:
+    return sum(r.duration_sec for r in ranges)
+
+
+def select_ranges(
+    ranges: Sequence[TimeRange],
+    budget_sec: float,
+    merge_gap_sec: float | None = None,
+    min_clip_sec: float | None = None,
+) -> list[TimeRange]:
+    """
+    Take ranges in relevance order until `budget_sec` of footage is covered (the last one is
+    shortened to fit). Returns them in playback order, with overlapping or nearly adjacent
+    ranges merged into one cut.
+    """
+    gap = float(settings.clip_merge_gap_sec if merge_gap_sec is None else merge_gap_sec)
+    min_clip = float(settings.clip_min_sec if min_clip_sec is None else min_clip_sec)
+
+    chosen: list[TimeRange] = []
+    merged: list[TimeRange] = []
+    for r in ranges:
+        if r.duration_sec <= 0:
+            continue
+        candidate = _merge([*chosen, r], gap)
+        excess = _total(candidate) - budget_sec
+        if excess > 0:
+            r = TimeRange(r.start_sec, r.end_sec - excess)
+            if r.duration_sec < min_clip:
+                break
+            candidate = _merge([*chosen, r], gap)
+            if _total(candidate) > budget_sec + 1e-6:
+                break
+        chosen.append(r)
+        merged = candidate
+        if _total(merged) >= budget_sec - 1e-6:
+            break
+    return merged
+
+
+def _concat_entry(source: str, cut: GopCut) -> str:
+    quoted = source.replace("'", "'\\''")
+    entry = f"file '{quoted}'\ninpoint {cut.start_sec:.6f}\n"
+    if cut.outpoint_sec is not None:
+        # `duration` (display time) places the next piece right after this one's last frame.
+        entry += f"outpoint {cut.outpoint_sec:.6f}\nduration {cut.end_sec - cut.start_sec:.6f}\n"
+    return entry
+
+
+def build_copy_command(list_path: Path, out_path: Path) -> list[str]:
+    """Cut every range listed in the concat file with stream copy: no decoding, no encoding."""
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-protocol_whitelist", PROTOCOLS]
+    cmd += ["-f", "concat", "-safe", "0", "-i", str(list_path)]
+    cmd += ["-map", "0:v:0", "-map", "0:a:0?", "-c", "copy", "-avoid_negative_ts", "make_zero"]
+    cmd += ["-movflags", "+faststart", str(out_path)]
+    return cmd
+
+
+def build_transcode_command(
+    source: str,
+    ranges: Sequence[TimeRange],
+    out_path: Path,
+    has_audio: bool,
+    options: EncodeOptions | None = None,
+) -> list[str]:
+    """Frame-accurate fallback: decode only the ranges, fit them to the vertical canvas, encode once."""
+    options = options or EncodeOptions()
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-protocol_whitelist", PROTOCOLS]
+    for r in ranges:
+        cmd += ["-ss", f"{r.start_sec:.3f}", "-t", f"{r.duration_sec:.3f}", "-i", source]
+    n = len(ranges)
+    graph = [
+        f"[{i}:v]scale={WIDTH}:{HEIGHT}:force_original_aspect_ratio=decrease,"
+        f"pad={WIDTH}:{HEIGHT}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={FPS}[v{i}]"
+        for i in range(n)
+    ]
+    inputs = "".join(f"[v{i}][{i}:a]" if has_audio else f"[v{i}]" for i in range(n))
+    graph.append(f"{inputs}concat=n={n}:v=1:a={int(has_audio)}[vout]" + ("[aout]" if has_audio else ""))
+    cmd += ["-filter_complex", ";".join(graph), "-map", "[vout]"]
+    if has_audio:
+        cmd += ["-map", "[aout]", "-c:a", "aac", "-b:a", options.audio_bitrate]
+    cmd += [
+        "-c:v", "libx264",
+        "-preset", options.preset,
+        "-crf", str(options.crf),
+        "-pix_fmt", "yuv420p",
+        "-threads", str(options.threads),
+        "-movflags", "+faststart",
+        str(out_path),
+    ]
+    return cmd
+
+
+def cut_clip_reel(
+    source: str,
+    ranges: Sequence[TimeRange],
+    out_path: Path,
+    options: EncodeOptions | None = None,
+    max_keyframe_drift_sec: float | None = None,
+) -> ClipReel:
+    """
+    Cut `ranges` (playback order, see `select_ranges`) out of `source` (a path or URL) into one
+    MP4 at `out_path`. Each cut is widened to keyframe boundaries and its packets are copied
+    as-is; the player fills the vertical frame. Sources the app cannot play as-is, and ranges
+    with no keyframe within `max_keyframe_drift_sec` of either end, are transcoded instead.
+    The concat list is written next to the output. Returns the output and its duration.
+    """
+    drift = float(settings.clip_max_keyframe_drift_sec if max_keyframe_drift_sec is None else max_keyframe_drift_sec)
+    info = probe_source(source)
+    if info.duration_sec > 0:
+        ranges = [TimeRange(r.start_sec, min(r.end_sec, info.duration_sec)) for r in ranges]
+    ranges = [r for r in ranges if r.duration_sec > 0]
+    if not ranges:
+        raise ClipError("no time ranges to cut")
+
+    copyable = info.video_codec in COPY_VIDEO_CODECS and info.audio_codec in COPY_AUDIO_CODECS | {None}
+    cuts: list[GopCut] = []
+    for r in ranges if copyable else []:
+        cut = _snap(source, r, drift, info.duration_sec)
+        if cut is None:
+            copyable = False
+            break
+        cuts.append(cut)
+
+    if copyable:
+        joined = _join_cuts(cuts)
+        list_path = out_path.with_suffix(".ffconcat")
+        list_path.write_text(
+            "ffconcat version 1.0\n" + "".join(_concat_entry(source, c) for c in joined),
+            encoding="utf-8",
+        )
+        try:
+            _run(build_copy_command(list_path, out_path))
+            return ClipReel(out_path, sum(c.end_sec - c.start_sec for c in joined))
+        except ClipError:
+            logger.warning("stream copy failed; transcoding clip instead", exc_info=True)
+
+    _run(build_transcode_command(source, ranges, out_path, info.audio_codec is not None, options))
+    return ClipReel(out_path, _total(ranges))
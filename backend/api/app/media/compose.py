@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import subprocess
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.config import settings
+
+WIDTH, HEIGHT, FPS = 1080, 1920, 30
+
+
+class ComposeError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class EncodeOptions:
+    preset: str = "veryfast"
+    crf: int = 23
+    threads: int = 0  # 0 = let x264 pick
+    audio_bitrate: str = "128k"
+
+    @classmethod
+    def from_settings(cls) -> EncodeOptions:
+        return cls(
+            preset=settings.ffmpeg_preset,
+            crf=settings.ffmpeg_crf,
+            threads=settings.ffmpeg_threads,
+            audio_bitrate=settings.ffmpeg_audio_bitrate,
+        )
+
+
+def _filter_path(path: Path) -> str:
+    # Two escaping levels: the filter option value, then the filtergraph itself.
+    value = str(path)
+    for ch in ("\\", "'", ":"):
+        value = value.replace(ch, "\\" + ch)
+    for ch in ("\\", "'", "[", "]", ",", ";"):
+        value = value.replace(ch, "\\" + ch)
+    return value
+
+
+def build_compose_command(
+    segments: Sequence[str],
+    out_path: Path,
+    voice_path: str | None = None,
+    music_path: str | None = None,
+    captions_path: Path | None = None,
+    duration_sec: float | None = None,
+    music_volume: float = 0.15,
+    options: EncodeOptions | None = None,
+) -> list[str]:
+    """
+    One ffmpeg invocation: normalize and concatenate the video segments, burn in captions,
+    mix the voice over a looped music bed, and encode once.
+    """
+    if not segments:
+        raise ComposeError("at least one video segment is required")
+    options = options or EncodeOptions()
+
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error"]
+    for seg in segments:
+        cmd += ["-i", seg]
+    n = len(segments)
+    audio: list[str] = []
+    if voice_path:
+        cmd += ["-i", voice_path]
+        audio.append(f"[{n}:a]apad[voice]")
+    else:
+        # Silent track so the output always has audio (players expect one).
+        cmd += ["-f", "lavfi", "-i", "anullsrc=r=44100:cl=mono"]
+        audio.append(f"[{n}:a]anull[voice]")
+    if music_path:
+        cmd += ["-stream_loop", "-1", "-i", music_path]
+        audio.append(f"[{n + 1}:a]volume={music_volume}[music]")
+        audio.append("[voice][music]amix=inputs=2:duration=first:dropout_transition=0:normalize=0[aout]")
+    else:
+        audio.append("[voice]anull[aout]")
+
+    graph = [
+        f"[{i}:v]scale={WIDTH}:{HEIGHT}:force_original_aspect_ratio=decrease,"
+        f"pad={WIDTH}:{HEIGHT}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={FPS}[v{i}]"
+        for i in range(n)
+    ]
+    graph.append("".join(f"[v{i}]" for i in range(n)) + f"concat=n={n}:v=1:a=0[vcat]")
+    if captions_path is not None:
+        graph.append(
+            f"[vcat]subtitles=filename={_filter_path(captions_path)}"
+            ":force_style='Alignment=2,FontSize=14,MarginV=80'[vout]"
+        )
+    else:
+        graph.append("[vcat]null[vout]")
+
+    graph += audio
+
+    cmd += ["-filter_complex", ";".join(graph), "-map", "[vout]", "-map", "[aout]"]
+    # Padded/looped audio is endless, so the video (or the explicit duration) ends the output.
+    cmd += ["-t", f"{duration_sec:g}"] if duration_sec else ["-shortest"]
+    cmd += [
+        "-c:v", "libx264",
+        "-preset", options.preset,
+        "-crf", str(options.crf),
+        "-pix_fmt", "yuv420p",
+        "-threads", str(options.threads),
+        "-c:a", "aac",
+        "-b:a", options.audio_bitrate,
+        "-movflags", "+faststart",
+        str(out_path),
+    ]
+    return cmd
+
+
+def compose_reel(
+    segments: Sequence[str],
+    out_path: Path,
+    voice_path: str | None = None,
+    music_path: str | None = None,
+    captions_vtt: str | None = None,
+    duration_sec: float | None = None,
+    options: EncodeOptions | None = None,
+) -> Path:
+    """
+    Render the final reel to `out_path`. Captions are written next to the output, so callers
+    should point `out_path` into a temporary directory they remove afterwards.
+    """
+    captions_path = None
+    if captions_vtt:
+        captions_path = out_path.with_suffix(".vtt")
+        captions_path.write_text(captions_vtt, encoding="utf-8")
+
+    cmd = build_compose_command(
+        segments,
+        out_path,
+        voice_path=voice_path,
+        music_path=music_path,
+        captions_path=captions_path,
+        duration_sec=duration_sec,
+        music_volume=settings.reel_music_volume,
+        options=options,
+    )
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except FileNotFoundError as e:
+        raise ComposeError("ffmpeg not found; install ffmpeg to render reels") from e
+    except subprocess.CalledProcessError as e:
+        stderr = (e.stderr or b"").decode("utf-8", "replace").strip()
+        raise ComposeError(f"ffmpeg failed: {stderr[-500:]}") from e
+    return out_path
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import csv
+import os
+import subprocess
+import tempfile
+import wave
+from collections.abc import Iterator
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Protocol
+
+from app.config import settings
+from app.process_pool import imap_bounded
+
+SAMPLE_RATE = 16000
+
+
+class TranscribeError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class TranscriptSegment:
+    text: str
+    start_sec: float
+    end_sec: float
+
+
+@dataclass(frozen=True)
+class AudioWindow:
+    path: str
+    start_sec: float
+    end_sec: float
+
+
+class AsrBackend(Protocol):
+    def transcribe(self, wav_path: str) -> list[TranscriptSegment]:
+        """Segments of a 16 kHz mono WAV file, timed relative to the start of the file."""
+        ...
+
+
+def _wav_duration(path: str) -> float:
+    with wave.open(path, "rb") as f:
+        return f.getnframes() / float(f.getframerate() or SAMPLE_RATE)
+
+
+class MockAsrBackend:
+    """Stub for tests and local dev: one deterministic segment per window, with real timings."""
+
+    def transcribe(self, wav_path: str) -> list[TranscriptSegment]:
+        duration = _wav_duration(wav_path)
+        if duration <= 0:
+            return []
+        return [TranscriptSegment(f"Mock transcript of audio {Path(wav_path).stem}.", 0.0, duration)]
+
+
+class FasterWhisperBackend:
+    """
+    Local CPU model via `faster-whisper` (optional dependency), int8 by default.
+    Each pool process loads its own model with a share of the cores.
+    """
+
+    def __init__(self, model_name: str, compute_type: str, language: str, cpu_threads: int) -> None:
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise RuntimeError("ASR_MODE=local requires `faster-whisper`; install it or use ASR_MODE=mock") from e
+
+        self.model = WhisperModel(model_name, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+        self.language = language or None
+
+    def transcribe(self, wav_path: str) -> list[TranscriptSegment]:
+        segments, _info = self.model.transcribe(wav_path, language=self.language, beam_size=1, vad_filter=True)
+        return [
+            TranscriptSegment(s.text.strip(), float(s.start), float(s.end)) for s in segments if s.text.strip()
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_backend() -> AsrBackend:
+    mode = (settings.asr_mode or "mock").lower()
+    if mode == "mock":
+        return MockAsrBackend()
+    if mode == "local":
+        threads = max(1, (os.cpu_count() or 1) // max(1, int(settings.asr_workers)))
+        return FasterWhisperBackend(settings.asr_local_model, settings.asr_compute_type, settings.asr_language, threads)
+    raise RuntimeError(f"Unknown ASR_MODE={mode!r}; use mock|local")
+
+
+def split_audio(video_path: str | Path, out_dir: Path, window_sec: float) -> list[AudioWindow]:
+    """
+    Extract the first audio track as 16 kHz mono PCM and cut it into `window_sec` windows,
+    in one ffmpeg pass. A video without audio yields no windows.
+    """
+    list_path = out_dir / "windows.csv"
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", str(video_path)]
+    # First audio track only; the trailing "?" makes a silent video an empty output, not an error.
+    cmd += ["-map", "0:a:0?", "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-c:a", "pcm_s16le"]
+    cmd += ["-f", "segment", "-segment_time", f"{window_sec:g}"]
+    cmd += ["-segment_list", str(list_path), "-segment_list_type", "csv"]
+    cmd.append(str(out_dir / "window_%05d.wav"))
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except FileNotFoundError as e:
+        raise TranscribeError("ffmpeg not found; install ffmpeg to transcribe videos") from e
+    except subprocess.CalledProcessError as e:
+        stderr = (e.stderr or b"").decode("utf-8", "replace").strip()
+        if "does not contain any stream" in stderr:
+            return []
+        raise TranscribeError(f"ffmpeg failed: {stderr[-500:]}") from e
+
+    with open(list_path, newline="") as f:
+        return [
+            AudioWindow(str(out_dir / Path(name).name), float(start), float(end))
+            for name, start, end in csv.reader(f)
+        ]
+
+
+def _transcribe_window(window: AudioWindow) -> list[TranscriptSegment]:
+    segments = get_backend().transcribe(window.path)
+    return [
+        TranscriptSegment(
+            s.text,
+            window.start_sec + s.start_sec,
+            min(window.end_sec, window.start_sec + s.end_sec),
+        )
+        for s in segments
+    ]
+
+
+def iter_transcript(
+    video_path: str | Path,
+    workers: int | None = None,
+    window_sec: float | None = None,
+) -> Iterator[TranscriptSegment]:
+    """
+    Yield transcript segments of a video in time order, with absolute timestamps.
+    With `workers` > 1, windows are transcribed on a process pool; at most 2 * workers
+    windows are in flight, and each window file is removed once transcribed.
+    """
+    workers = settings.asr_workers if workers is None else workers
+    window_sec = max(1.0, float(window_sec or settings.asr_window_sec))
+
+    with tempfile.TemporaryDirectory(prefix="doomlearn_asr_") as tmp:
+        windows = split_audio(video_path, Path(tmp), window_sec)
+
+        if workers <= 1 or len(windows) <= 1:
+            for window in windows:
+                yield from _transcribe_window(window)
+                os.remove(window.path)
+            return
+
+        for window, segments in imap_bounded(_transcribe_window, windows, workers):
+            os.remove(window.path)
+            yield from segments
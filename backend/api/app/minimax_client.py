@@ -10,9 +10,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-import httpx
-
 from app.config import settings
+from app.minimax_http import MinimaxHTTPError, post_json
 
 
 class MinimaxClientError(RuntimeError):
@@ -69,25 +68,18 @@ def minimax_llm_generate_concepts(payload: dict[str, Any]) -> dict[str, Any]:
     # Placeholder for real MiniMax LLM call.
     # Implement according to MiniMax docs for your chosen model.
     try:
-        with httpx.Client(base_url=settings.minimax_base_url, timeout=60.0) as client:
-            resp = client.post(
-                "/v1/llm/generate",
-                headers={"Authorization": f"Bearer {settings.minimax_api_key}"},
-                json=payload,
-            )
-            resp.raise_for_status()
-            return resp.json()
-    except Exception as e:
+        return post_json("/v1/llm/generate", payload)
+    except MinimaxHTTPError as e:
         raise MinimaxClientError(f"MiniMax LLM call failed: {e}") from e
 
 
-def minimax_tts_generate_voice(script: str, voice_style: str) -> str:
+def minimax_tts_generate_voice(script: str, voice_style: str, out_dir: str | None = None) -> str:
     """
     Required function.
-    Output: path to an audio file.
+    Output: path to an audio file (under `out_dir` when given, so the caller can clean it up).
     """
     if settings.minimax_mock:
-        fd, path = tempfile.mkstemp(prefix="doomlearn_tts_", suffix=".wav")
+        fd, path = tempfile.mkstemp(prefix="doomlearn_tts_", suffix=".wav", dir=out_dir)
         os.close(fd)
         # Generate 1s of silence so downstream muxing works.
         with wave.open(path, "wb") as wf:
@@ -104,13 +96,13 @@ def minimax_tts_generate_voice(script: str, voice_style: str) -> str:
     raise MinimaxClientError("MiniMax TTS real call not implemented (use MINIMAX_MOCK=1 for dev)")
 
 
-def minimax_music_generate(mood: str, duration: int) -> str:
+def minimax_music_generate(mood: str, duration: int, out_dir: str | None = None) -> str:
     """
     Required function (optional use).
-    Output: path to a music track file.
+    Output: path to a music track file (under `out_dir` when given).
     """
     if settings.minimax_mock:
-        fd, path = tempfile.mkstemp(prefix="doomlearn_music_", suffix=".wav")
+        fd, path = tempfile.mkstemp(prefix="doomlearn_music_", suffix=".wav", dir=out_dir)
         os.close(fd)
         with wave.open(path, "wb") as wf:
             wf.setnchannels(1)
@@ -125,13 +117,13 @@ def minimax_music_generate(mood: str, duration: int) -> str:
     raise MinimaxClientError("MiniMax music real call not implemented (use MINIMAX_MOCK=1 for dev)")
 
 
-def minimax_video_generate(prompt: str, assets: dict[str, Any] | None = None) -> str:
+def minimax_video_generate(prompt: str, assets: dict[str, Any] | None = None, out_dir: str | None = None) -> str:
     """
     Required function.
-    Output: path to a generated video segment (vertical).
+    Output: path to a generated video segment (vertical; under `out_dir` when given).
     """
     if settings.minimax_mock:
-        out = Path(tempfile.mkdtemp(prefix="doomlearn_video_")) / "segment.mp4"
+        out = Path(tempfile.mkdtemp(prefix="doomlearn_video_", dir=out_dir)) / "segment.mp4"
         duration = int((assets or {}).get("duration_sec") or 3)
         _ffmpeg_generate_color_video(str(out), duration=duration)
         return str(out)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any
+
+import httpx
+
+from app.cache import get_redis
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+RATE_LIMIT_KEY = "doomlearn:ratelimit:minimax"
+
+# Token bucket shared by every API/worker process. Uses the Redis clock so processes on
+# different hosts agree. Returns 0 when a token was taken, else the seconds to wait.
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class MinimaxHTTPError(RuntimeError):
+    def __init__(self, message: str, retryable: bool = False) -> None:
+        super().__init__(message)
+        # True when the call failed on a transient condition (after this module's own retries).
+        self.retryable = retryable
+
+
+_lock = threading.Lock()
+_client_instance: httpx.Client | None = None
+_client_pid: int | None = None
+_bucket_script = None
+
+
+def _limits() -> httpx.Limits:
+    n = int(settings.minimax_max_connections)
+    return httpx.Limits(max_connections=n, max_keepalive_connections=n)
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(float(settings.minimax_timeout_sec), connect=float(settings.minimax_connect_timeout_sec))
+
+
+def _headers() -> dict[str, str]:
+    if not settings.minimax_api_key:
+        raise MinimaxHTTPError("MINIMAX_API_KEY is not configured")
+    return {"Authorization": f"Bearer {settings.minimax_api_key}"}
+
+
+def _client() -> httpx.Client:
+    """Process-wide pooled client (keep-alive connections); rebuilt after fork like the S3 client."""
+    global _client_instance, _client_pid
+    pid = os.getpid()
+    if _client_instance is None or _client_pid != pid:
+        with _lock:
+            if _client_instance is None or _client_pid != pid:
+                _client_instance = httpx.Client(
+                    base_url=settings.minimax_base_url, limits=_limits(), timeout=_timeout()
+                )
+                _client_pid = pid
+    return _client_instance
+
+
+def _reserve_token() -> float:
+    """Take a token from the shared bucket; returns how long to wait first (0 = go). Fails open."""
+    global _bucket_script
+    if settings.minimax_rate_per_sec <= 0:
+        return 0.0
+    try:
+        if _bucket_script is None:
+            _bucket_script = get_redis().register_script(_TOKEN_BUCKET_LUA)
+        return float(
+            _bucket_script(keys=[RATE_LIMIT_KEY], args=[settings.minimax_rate_per_sec, settings.minimax_burst])
+        )
+    except Exception:
+        logger.warning("MiniMax rate limiter unavailable; proceeding without it", exc_info=True)
+        return 0.0
+
+
+def _backoff(attempt: int, resp: httpx.Response | None) -> float:
+    if resp is not None and resp.headers.get("Retry-After", "").isdigit():
+        return min(float(resp.headers["Retry-After"]), float(settings.minimax_backoff_max_sec))
+    # Full jitter: uniform over [0, min(cap, base * 2^attempt)].
+    cap = min(float(settings.minimax_backoff_max_sec), float(settings.minimax_backoff_base_sec) * 2**attempt)
+    return random.uniform(0, cap)
+
+
+def _should_retry(attempt: int, resp: httpx.Response | None, exc: Exception | None) -> bool:
+    if attempt >= int(settings.minimax_max_retries):
+        return False
+    if exc is not None:
+        return isinstance(exc, httpx.TransportError)
+    return resp is not None and resp.status_code in RETRY_STATUS
+
+
+def _result(resp: httpx.Response | None, exc: Exception | None, path: str) -> dict[str, Any]:
+    if exc is not None:
+        retryable = isinstance(exc, httpx.TransportError)
+        raise MinimaxHTTPError(f"MiniMax call {path} failed: {exc}", retryable=retryable) from exc
+    try:
+        resp.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        retryable = resp.status_code in RETRY_STATUS
+        raise MinimaxHTTPError(f"MiniMax call {path} failed: {e}", retryable=retryable) from e
+    return resp.json()
+
+
+def post_json(path: str, payload: dict[str, Any]) -> dict[str, Any]:
+    """POST to MiniMax through the shared pool, rate limiter and retry policy."""
+    headers = _headers()
+    attempt = 0
+    while True:
+        while (wait := _reserve_token()) > 0:
+            time.sleep(wait)
+        resp, exc = None, None
+        try:
+            resp = _client().post(path, headers=headers, json=payload)
+        except httpx.HTTPError as e:
+            exc = e
+        if not _should_retry(attempt, resp, exc):
+            return _result(resp, exc, path)
+        delay = _backoff(attempt, resp)
+        logger.info("MiniMax %s: retrying in %.2fs (attempt %d)", path, delay, attempt + 1)
+        time.sleep(delay)
+        attempt += 1
+
@@ -7,16 +7,19 @@ from datetime import datetime
 from pgvector.sqlalchemy import Vector
 from sqlalchemy import (
     JSON,
+    BigInteger,
     Boolean,
     DateTime,
     Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     UniqueConstraint,
     func,
+    text,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -37,6 +40,12 @@ class UploadStatus(str, enum.Enum):
     failed = "failed"
 
 
+class StageStatus(str, enum.Enum):
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
 class ReelSource(str, enum.Enum):
     clip = "clip"
     generated = "generated"
@@ -121,6 +130,8 @@ class Upload(Base):
         Enum(UploadStatus, name="upload_status"), default=UploadStatus.uploaded
     )
     metadata_json: Mapped[dict | None] = mapped_column(JSON)
+    # Set for content-addressed uploads (see ContentBlob); NULL for legacy per-upload keys.
+    content_sha256: Mapped[str | None] = mapped_column(String(64), index=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
@@ -131,6 +142,48 @@ class Upload(Base):
     chunks: Mapped[list["Chunk"]] = relationship(back_populates="upload", cascade="all, delete-orphan")
 
 
+class UploadStage(Base):
+    """
+    Checkpoint of one ingestion stage of an upload (see app.upload_stages). A stage is marked
+    done in the same transaction as its output, so a retried task skips it.
+    """
+
+    __tablename__ = "upload_stages"
+
+    upload_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("uploads.id", ondelete="CASCADE"), primary_key=True
+    )
+    name: Mapped[str] = mapped_column(String(80), primary_key=True)  # chunks|packs|reel:<topic_id>
+    status: Mapped[StageStatus] = mapped_column(Enum(StageStatus, name="stage_status"))
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    result_json: Mapped[dict | None] = mapped_column(JSON)
+    error: Mapped[str | None] = mapped_column(Text)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class ContentBlob(Base):
+    """
+    One stored object per distinct file content. Uploads of the same bytes share the object
+    and the chunks/embeddings of the first upload that finished ingesting them.
+    """
+
+    __tablename__ = "content_blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    object_key: Mapped[str] = mapped_column(String(500))
+    size_bytes: Mapped[int] = mapped_column(BigInteger)
+    content_type: Mapped[str | None] = mapped_column(String(200))
+    canonical_upload_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("uploads.id", ondelete="SET NULL")
+    )
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
 class Chunk(Base):
     __tablename__ = "chunks"
 
@@ -141,11 +194,26 @@ class Chunk(Base):
     embedding: Mapped[list[float] | None] = mapped_column(Vector(settings.vector_dim))
     start_sec: Mapped[float | None] = mapped_column(Float)
     end_sec: Mapped[float | None] = mapped_column(Float)
+    # Source location in the extracted document (1-based pages, character offsets per page).
+    page: Mapped[int | None] = mapped_column(Integer)
+    char_start: Mapped[int | None] = mapped_column(Integer)
+    page_end: Mapped[int | None] = mapped_column(Integer)
+    char_end: Mapped[int | None] = mapped_column(Integer)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     upload: Mapped["Upload"] = relationship(back_populates="chunks")
 
+    __table_args__ = (
+        Index(
+            "ix_chunks_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
+
 
 class Reel(Base):
     __tablename__ = "reels"
@@ -163,6 +231,12 @@ class Reel(Base):
 
     course: Mapped["Course"] = relationship(back_populates="reels")
 
+    __table_args__ = (
+        # Keyset pagination for the feed:
+        # WHERE course_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC
+        Index("ix_reels_course_created_id", "course_id", text("created_at DESC"), text("id DESC")),
+    )
+
 
 class Quiz(Base):
     __tablename__ = "quizzes"
@@ -193,12 +267,26 @@ class UserProgress(Base):
     last_seen_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     next_review_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
+    # SM-2 state (see app.progress.scheduler).
+    ease_factor: Mapped[float] = mapped_column(Float, default=2.5, server_default="2.5")
+    interval_days: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    repetitions: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
-    __table_args__ = (UniqueConstraint("user_id", "course_id", "topic_id", name="uq_user_course_topic"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "course_id", "topic_id", name="uq_user_course_topic"),
+        # Due queue: "what should this user review now" is a range scan, not a per-course scan.
+        Index(
+            "ix_user_progress_due",
+            "user_id",
+            "next_review_at",
+            postgresql_where=text("next_review_at IS NOT NULL"),
+        ),
+    )
 
 
 class FeedEvent(Base):
@@ -216,3 +304,18 @@ class FeedEvent(Base):
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
+
+class GenerationCacheEntry(Base):
+    """Memoized MiniMax output keyed by a canonical hash of its inputs (see app.generation_cache)."""
+
+    __tablename__ = "generation_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(20))  # llm|reel|clip|tts|video|music
+    # llm: the response JSON; media: {"object_key": ...} of the content-addressed S3 object.
+    value_json: Mapped[dict] = mapped_column(JSON)
+    hit_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    last_hit_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from typing import TypeVar
+
+# billiard (Celery's fork of multiprocessing) can start children from a daemonic process,
+# which the stdlib refuses: ingestion runs inside Celery prefork children.
+from billiard.pool import Pool
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def imap_bounded(fn: Callable[[T], R], items: Iterable[T], workers: int) -> Iterator[tuple[T, R]]:
+    """
+    Yield (item, fn(item)) in input order, computed on a pool of `workers` processes.
+    At most 2 * workers items are in flight, so memory stays bounded on long inputs.
+    """
+    pending = iter(items)
+    pool = Pool(processes=workers)
+    in_flight = deque()
+    try:
+        for item in pending:
+            in_flight.append((item, pool.apply_async(fn, (item,))))
+            if len(in_flight) >= 2 * workers:
+                break
+        while in_flight:
+            item, result = in_flight.popleft()
+            value = result.get()
+            nxt = next(pending, None)
+            if nxt is not None:
+                in_flight.append((nxt, pool.apply_async(fn, (nxt,))))
+            yield item, value
+    finally:
+        # Stopped early (error or the caller closed the iterator): let the few in-flight items
+        # finish rather than terminate(), which can block billiard's result handler.
+        for _item, result in in_flight:
+            result.wait()
+        pool.close()
+        pool.join()
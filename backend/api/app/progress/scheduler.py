@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Integer, case, cast, func, literal, select
+from sqlalchemy.orm import Session
+
+from app.models import UserProgress
+
+# SM-2 (SuperMemo 2). Review quality is graded 0..5; >= 3 counts as a successful recall.
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+PASSING_QUALITY = 3
+FIRST_INTERVAL_DAYS = 1
+SECOND_INTERVAL_DAYS = 6
+
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 1
+
+_ONE_DAY = literal(timedelta(days=1))
+
+
+def quiz_quality(correct: bool) -> int:
+    return QUALITY_CORRECT if correct else QUALITY_WRONG
+
+
+def _next_ease(ease, quality):
+    miss = 5 - quality
+    return func.greatest(MIN_EASE, ease + (0.1 - miss * (0.08 + miss * 0.02)))
+
+
+def sm2_insert_values(quality) -> dict:
+    """
+    Scheduling columns for a new progress row. `quality` is a (possibly NULL) SQL integer;
+    NULL means "seen, not graded" (e.g. a watch), which leaves the topic due now.
+    """
+    passed = quality >= PASSING_QUALITY
+    interval = case((quality.is_(None), 0), else_=FIRST_INTERVAL_DAYS)
+    return {
+        "ease_factor": case((quality.is_(None), DEFAULT_EASE), else_=_next_ease(DEFAULT_EASE, quality)),
+        "interval_days": interval,
+        "repetitions": case((passed, 1), else_=0),
+        "next_review_at": func.now() + interval * _ONE_DAY,
+    }
+
+
+def sm2_update_values(table, quality) -> dict:
+    """
+    ON CONFLICT DO UPDATE assignments for one SM-2 step. Column references read the row's
+    current values, so the whole step is evaluated atomically inside the upsert.
+    """
+    passed = quality >= PASSING_QUALITY
+    interval = case(
+        (quality.is_(None), table.c.interval_days),
+        (~passed, FIRST_INTERVAL_DAYS),
+        (table.c.repetitions == 0, FIRST_INTERVAL_DAYS),
+        (table.c.repetitions == 1, SECOND_INTERVAL_DAYS),
+        else_=cast(func.round(table.c.interval_days * table.c.ease_factor), Integer),
+    )
+    return {
+        "ease_factor": case((quality.is_(None), table.c.ease_factor), else_=_next_ease(table.c.ease_factor, quality)),
+        "interval_days": interval,
+        "repetitions": case(
+            (quality.is_(None), table.c.repetitions),
+            (passed, table.c.repetitions + 1),
+            else_=0,
+        ),
+        "next_review_at": case(
+            (quality.is_(None), table.c.next_review_at),
+            else_=func.now() + interval * _ONE_DAY,
+        ),
+    }
+
+
+def due_now(
+    db: Session,
+    user_id: uuid.UUID,
+    course_id: uuid.UUID | None = None,
+    now: datetime | None = None,
+    limit: int = 50,
+) -> list[UserProgress]:
+    """Progress rows whose review is due, most overdue first. Served by ix_user_progress_due."""
+    q = (
+        select(UserProgress)
+        .where(
+            UserProgress.user_id == user_id,
+            UserProgress.next_review_at.is_not(None),
+            UserProgress.next_review_at <= (now or datetime.now(timezone.utc)),
+        )
+        .order_by(UserProgress.next_review_at)
+        .limit(limit)
+    )
+    if course_id is not None:
+        q = q.where(UserProgress.course_id == course_id)
+    return list(db.scalars(q))
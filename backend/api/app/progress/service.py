@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterable
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Float, Integer, bindparam, cast, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models import UserProgress
+from app.progress.scheduler import sm2_insert_values, sm2_update_values
+
+# Mastery nudges per event.
+WATCH_DELTA_MAX = 0.05
+WATCH_DELTA_PER_SEC = 1.0 / 300.0
+QUIZ_CORRECT_DELTA = 0.2
+QUIZ_WRONG_DELTA = -0.1
+
+
+def watch_delta(watch_time_sec: float) -> float:
+    return min(WATCH_DELTA_MAX, watch_time_sec * WATCH_DELTA_PER_SEC)
+
+
+def quiz_delta(correct: bool) -> float:
+    return QUIZ_CORRECT_DELTA if correct else QUIZ_WRONG_DELTA
+
+
+def _clamp(expr):
+    return func.greatest(0.0, func.least(1.0, expr))
+
+
+def _mastery_upsert():
+    """
+    INSERT ... ON CONFLICT (user_id, course_id, topic_id) DO UPDATE, with the mastery clamp and
+    the SM-2 step (app.progress.scheduler) computed in SQL from the row's current values.
+    Binds: p_id, p_user_id, p_course_id, p_topic_id, delta, seen_at, quality (NULL = not graded).
+    """
+    table = UserProgress.__table__
+    delta = bindparam("delta", type_=Float)
+    seen_at = bindparam("seen_at", type_=DateTime(timezone=True))
+    quality = cast(bindparam("quality", type_=Integer), Integer)
+    start = _clamp(delta)
+    stmt = pg_insert(table).values(
+        id=bindparam("p_id"),
+        user_id=bindparam("p_user_id"),
+        course_id=bindparam("p_course_id"),
+        topic_id=bindparam("p_topic_id"),
+        mastery_score=start,
+        last_seen_at=seen_at,
+        **sm2_insert_values(quality),
+    )
+    new_mastery = _clamp(table.c.mastery_score + delta)
+    return stmt.on_conflict_do_update(
+        constraint="uq_user_course_topic",
+        set_={
+            "mastery_score": new_mastery,
+            "last_seen_at": func.greatest(table.c.last_seen_at, seen_at),
+            **sm2_update_values(table, quality),
+            "updated_at": func.now(),
+        },
+    )
+
+
+def _params(user_id, course_id, topic_id, delta: float, seen_at: datetime | None, quality: int | None) -> dict:
+    return {
+        "p_id": uuid.uuid4(),
+        "p_user_id": user_id,
+        "p_course_id": course_id,
+        "p_topic_id": topic_id,
+        "delta": delta,
+        "seen_at": seen_at,
+        "quality": quality,
+    }
+
+
+def apply_mastery_delta(
+    db: Session,
+    user_id: uuid.UUID,
+    course_id: uuid.UUID,
+    topic_id: uuid.UUID,
+    delta: float,
+    seen_at: datetime | None = None,
+    quality: int | None = None,
+) -> tuple[float, datetime]:
+    """
+    Atomically create-or-update one progress row; one round trip. Pass an SM-2 `quality`
+    (see `app.progress.scheduler.quiz_quality`) for graded reviews. Returns (mastery, next_review_at).
+    """
+    table = UserProgress.__table__
+    stmt = _mastery_upsert().returning(table.c.mastery_score, table.c.next_review_at)
+    row = db.execute(
+        stmt, _params(user_id, course_id, topic_id, delta, seen_at or datetime.now(timezone.utc), quality)
+    ).one()
+    return row.mastery_score, row.next_review_at
+
+
+def apply_mastery_deltas(
+    db: Session,
+    deltas: Iterable[tuple[uuid.UUID, uuid.UUID, uuid.UUID, float, datetime, int | None]],
+) -> None:
+    """
+    Bulk variant: one upsert row per (user_id, course_id, topic_id, delta, seen_at, quality),
+    one executemany.
+    """
+    rows = [_params(u, c, t, d, seen, q) for u, c, t, d, seen, q in deltas]
+    if rows:
+        db.execute(_mastery_upsert(), rows)
+
+
+def ensure_progress(
+    db: Session,
+    user_id: uuid.UUID,
+    course_id: uuid.UUID,
+    topic_ids: Iterable[uuid.UUID],
+    next_review_at: datetime,
+) -> None:
+    """Create missing progress rows (mastery 0) without touching existing ones."""
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "course_id": course_id,
+            "topic_id": topic_id,
+            "mastery_score": 0.0,
+            "last_seen_at": None,
+            "next_review_at": next_review_at,
+        }
+        for topic_id in topic_ids
+    ]
+    if rows:
+        db.execute(
+            pg_insert(UserProgress.__table__).on_conflict_do_nothing(constraint="uq_user_course_topic"),
+            rows,
+        )
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterable, Iterator
+from itertools import islice
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Chunk
+from app.rag.chunking import TextChunk
+from app.rag.embeddings import embed_texts
+
+
+def _batched(items: Iterable[TextChunk], size: int) -> Iterator[list[TextChunk]]:
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def write_chunks(
+    db: Session,
+    upload_id: uuid.UUID,
+    chunks: Iterable[TextChunk],
+    batch_size: int | None = None,
+) -> int:
+    """
+    Embed and insert chunks in fixed-size batches with a Core executemany.
+    Only one batch of text/embeddings is held at a time and no ORM instances are
+    created, so the session identity map stays empty. The caller owns the commit.
+    """
+    size = max(1, int(batch_size or settings.chunk_insert_batch_size))
+    stmt = insert(Chunk.__table__)
+    total = 0
+    for batch in _batched(chunks, size):
+        embeddings = embed_texts([c.text for c in batch])
+        db.execute(
+            stmt,
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "upload_id": upload_id,
+                    "topic_id": None,
+                    "text": c.text,
+                    "embedding": emb,
+                    "page": c.page,
+                    "char_start": c.start,
+                    "page_end": c.page_end,
+                    "char_end": c.end,
+                    "start_sec": c.start_sec,
+                    "end_sec": c.end_sec,
+                }
+                for c, emb in zip(batch, embeddings)
+            ],
+        )
+        total += len(batch)
+    return total
@@ -1,28 +1,263 @@
 from __future__ import annotations
 
+import re
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
+from typing import NamedTuple, Protocol
+
+import numpy as np
+
+from app.config import settings
 
 
 @dataclass(frozen=True)
 class TextChunk:
     text: str
+    # 1-based page numbers and character offsets into the page text: the chunk runs from
+    # `start` on `page` to `end` on `page_end` (pages are joined with a blank line).
+    page: int | None = None
+    start: int | None = None
+    page_end: int | None = None
+    end: int | None = None
+    # Media time range, for chunks cut from a transcript.
+    start_sec: float | None = None
+    end_sec: float | None = None
+
+
+class TimedText(Protocol):
+    """A piece of transcript with its media time range (e.g. `app.media.transcribe.TranscriptSegment`)."""
+
+    text: str
+    start_sec: float
+    end_sec: float
+
+
+# Break strength *before* a span: preferred cut points are the strongest ones that fit.
+WORD, SENTENCE, PARAGRAPH, HEADING = 0, 1, 2, 3
+
+_PARAGRAPH = re.compile(r"\n[ \t]*\n\s*")
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])")
+_HEADING = re.compile(r"(?:#{1,6}\s+\S.*|\d+(?:\.\d+)*\.?\s+[A-Z][^.!?]*|[A-Z][A-Z0-9 ,:&()-]{2,})")
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_WORD = re.compile(r"\S+")
+
+
+class _Span(NamedTuple):
+    page: int
+    start: int
+    end: int
+    tokens: int
+    strength: int
+
+
+def count_tokens(text: str, start: int = 0, end: int | None = None) -> int:
+    """Approximate model tokens (words and punctuation marks) without slicing the text."""
+    return sum(1 for _ in _TOKEN.finditer(text, start, len(text) if end is None else end))
+
+
+def _trimmed(text: str, start: int, end: int) -> tuple[int, int]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _split_long(text: str, page: int, start: int, end: int, strength: int, budget: int) -> Iterator[_Span]:
+    """A sentence over budget (tables, formulas, run-ons) is cut at word boundaries."""
+    piece_start, tokens = None, 0
+    for m in _WORD.finditer(text, start, end):
+        n = count_tokens(text, m.start(), m.end())
+        if piece_start is not None and tokens + n > budget:
+            yield _Span(page, piece_start, prev_end, tokens, strength)
+            piece_start, tokens, strength = None, 0, WORD
+        if piece_start is None:
+            piece_start = m.start()
+        tokens += n
+        prev_end = m.end()
+    if piece_start is not None:
+        yield _Span(page, piece_start, prev_end, tokens, strength)
+
+
+def _page_spans(text: str, page: int, budget: int) -> Iterator[_Span]:
+    """Sentence-level spans of one page, tagged with the strength of the break before them."""
+    para_start = 0
+    paragraphs = [(m.start(), m.end()) for m in _PARAGRAPH.finditer(text)] + [(len(text), len(text))]
+    for para_end, next_start in paragraphs:
+        p_start, p_end = _trimmed(text, para_start, para_end)
+        para_start = next_start
+        if p_start == p_end:
+            continue
+        strength = PARAGRAPH
+
+        # A short first line without closing punctuation is a heading: cut before it, never after.
+        nl = text.find("\n", p_start, p_end)
+        first_end = p_end if nl < 0 else nl
+        if first_end - p_start <= 80 and _HEADING.fullmatch(text, p_start, first_end) and nl >= 0:
+            yield _Span(page, p_start, first_end, count_tokens(text, p_start, first_end), HEADING)
+            p_start, _ = _trimmed(text, first_end, p_end)
+            strength = SENTENCE
+
+        s_start = p_start
+        for m in [*_SENTENCE_END.finditer(text, p_start, p_end), None]:
+            s_end = p_end if m is None else m.start()
+            s_start, s_end = _trimmed(text, s_start, s_end)
+            if s_start < s_end:
+                tokens = count_tokens(text, s_start, s_end)
+                if tokens > budget:
+                    yield from _split_long(text, page, s_start, s_end, strength, budget)
+                else:
+                    yield _Span(page, s_start, s_end, tokens, strength)
+                strength = SENTENCE
+            if m is not None:
+                s_start = m.end()
+
 
+def _pick_cut(tokens: np.ndarray, strength: np.ndarray, target: int, min_tokens: int) -> int:
+    """
+    Number of leading spans to emit: the last of the strongest boundaries whose chunk size
+    lies in [min_tokens, target]. Requires tokens.sum() > target.
+    """
+    cum = np.cumsum(tokens)
+    fit = max(1, int(np.searchsorted(cum, target, side="right")))
+    lo = max(1, min(fit, int(np.searchsorted(cum, min_tokens, side="left")) + 1))
+    candidates = np.arange(lo, fit + 1)
+    scores = strength[candidates]  # strength of the break before the first span left out
+    return int(candidates[len(scores) - 1 - int(np.argmax(scores[::-1]))])
 
-def chunk_text(text: str, target_chars: int = 900, overlap_chars: int = 120) -> list[TextChunk]:
+
+def _overlap(tokens: np.ndarray, cut: int, overlap: int) -> int:
+    """How many trailing spans of the emitted chunk (at most `overlap` tokens) start the next one."""
+    if overlap <= 0 or cut <= 1:
+        return 0
+    back = np.cumsum(tokens[cut - 1 :: -1])
+    return min(cut - 1, int(np.searchsorted(back, overlap, side="right")))
+
+
+def _budget(target_tokens: int | None, overlap_tokens: int | None) -> tuple[int, int, int]:
+    """(target, overlap, min_tokens) for a chunk, from the arguments or settings."""
+    target = max(8, int(target_tokens or settings.chunk_target_tokens))
+    overlap = min(target // 2, int(settings.chunk_overlap_tokens if overlap_tokens is None else overlap_tokens))
+    return target, overlap, target // 2
+
+
+def _next_cut(
+    tokens: np.ndarray, strength: np.ndarray, fresh: int, target: int, min_tokens: int, overlap: int
+) -> tuple[int, int]:
+    """
+    (cut, keep): emit the first `cut` pending items, then carry the last `keep` of them into the
+    next chunk. Every chunk contains at least one item not emitted before, so cutting always
+    makes progress. No overlap into a new section: a heading starts the next chunk clean.
+    """
+    cut = max(fresh + 1, _pick_cut(tokens, strength, target, min_tokens))
+    keep = 0
+    if cut < len(tokens) and strength[cut] != HEADING:
+        keep = _overlap(tokens, cut, overlap)
+    return cut, keep
+
+
+def _render(spans: list[_Span], texts: dict[int, str]) -> TextChunk:
+    parts, i = [], 0
+    while i < len(spans):
+        j = i
+        while j + 1 < len(spans) and spans[j + 1].page == spans[i].page:
+            j += 1
+        parts.append(texts[spans[i].page][spans[i].start : spans[j].end])
+        i = j + 1
+    first, last = spans[0], spans[-1]
+    return TextChunk(
+        text="\n\n".join(parts), page=first.page, start=first.start, page_end=last.page, end=last.end
+    )
+
+
+def iter_chunks(
+    pages: Iterable[str],
+    target_tokens: int | None = None,
+    overlap_tokens: int | None = None,
+) -> Iterator[TextChunk]:
+    """
+    Stream chunks of about `target_tokens` tokens over page texts, cutting at heading,
+    paragraph or sentence boundaries (strongest first) and at word boundaries only inside
+    an over-long sentence. Pending text is tracked as (page, offset) spans, so overlap costs
+    no copying; each chunk's text is sliced once from the page it came from. Only the pages
+    still referenced by pending spans are kept in memory.
+    """
+    target, overlap, min_tokens = _budget(target_tokens, overlap_tokens)
+
+    texts: dict[int, str] = {}
+    pending: list[_Span] = []
+    fresh = 0  # pending[fresh:] has not been emitted yet (pending[:fresh] is overlap)
+    total = 0
+    for page_no, text in enumerate(pages, start=1):
+        texts[page_no] = text or ""
+        for span in _page_spans(texts[page_no], page_no, target):
+            pending.append(span)
+            total += span.tokens
+            while total > target:
+                tokens = np.fromiter((s.tokens for s in pending), dtype=np.int64, count=len(pending))
+                strength = np.fromiter((s.strength for s in pending), dtype=np.int8, count=len(pending))
+                cut, keep = _next_cut(tokens, strength, fresh, target, min_tokens, overlap)
+                yield _render(pending[:cut], texts)
+                pending = pending[cut - keep :]
+                fresh = keep
+                total = int(tokens[cut - keep :].sum())
+
+        first_page = pending[0].page if pending else page_no + 1
+        for stale in [p for p in texts if p < first_page]:
+            del texts[stale]
+
+    if len(pending) > fresh:
+        yield _render(pending, texts)
+
+
+def _render_timed(segments: list[TimedText]) -> TextChunk:
+    return TextChunk(
+        text=" ".join(s.text.strip() for s in segments),
+        start_sec=segments[0].start_sec,
+        end_sec=segments[-1].end_sec,
+    )
+
+
+def iter_timed_chunks(
+    segments: Iterable[TimedText],
+    target_tokens: int | None = None,
+    overlap_tokens: int | None = None,
+) -> Iterator[TextChunk]:
+    """
+    Group transcript segments into chunks of about `target_tokens` tokens, preferring to cut
+    after a segment that ends a sentence. Segments are never split, so every chunk maps to
+    the exact time range [first segment start, last segment end] of the source media.
+    """
+    target, overlap, min_tokens = _budget(target_tokens, overlap_tokens)
+
+    pending: list[TimedText] = []
+    counts: list[int] = []
+    strengths: list[int] = []
+    fresh = 0
+    total = 0
+    for seg in segments:
+        text = seg.text.strip()
+        if not text:
+            continue
+        ends_sentence = not pending or pending[-1].text.rstrip().endswith((".", "!", "?"))
+        pending.append(seg)
+        counts.append(count_tokens(text))
+        strengths.append(SENTENCE if ends_sentence else WORD)
+        total += counts[-1]
+        while total > target:
+            tokens = np.asarray(counts, dtype=np.int64)
+            cut, keep = _next_cut(tokens, np.asarray(strengths, dtype=np.int8), fresh, target, min_tokens, overlap)
+            yield _render_timed(pending[:cut])
+            pending, counts, strengths = pending[cut - keep :], counts[cut - keep :], strengths[cut - keep :]
+            fresh = keep
+            total = int(tokens[cut - keep :].sum())
+
+    if len(pending) > fresh:
+        yield _render_timed(pending)
+
+
+def chunk_text(text: str, target_tokens: int | None = None, overlap_tokens: int | None = None) -> list[TextChunk]:
     text = (text or "").strip()
     if not text:
         return []
-
-    chunks: list[TextChunk] = []
-    start = 0
-    n = len(text)
-    while start < n:
-        end = min(n, start + target_chars)
-        chunk = text[start:end].strip()
-        if chunk:
-            chunks.append(TextChunk(text=chunk))
-        if end >= n:
-            break
-        start = max(0, end - overlap_chars)
-    return chunks
-
+    return list(iter_chunks([text], target_tokens=target_tokens, overlap_tokens=overlap_tokens))
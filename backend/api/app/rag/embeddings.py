@@ -1,27 +1,105 @@
 from __future__ import annotations
 
 import hashlib
-import math
-import random
+from functools import lru_cache
+from typing import Protocol
+
+import numpy as np
 
 from app.config import settings
 
 
-def embed_text(text: str) -> list[float]:
+class EmbeddingBackend(Protocol):
+    dim: int
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Return a float32 matrix of shape (len(texts), dim), rows L2-normalized."""
+        ...
+
+
+def _l2_normalize(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+class MockEmbeddingBackend:
     """
-    Hackathon-light embeddings.
-    - mock: deterministic pseudo-random vector (stable across runs)
-    - local: not implemented by default (kept minimal for MVP)
+    Deterministic pseudo-random vectors (stable across runs and processes).
+    Each text is hashed to a 64-bit seed and the whole (n, dim) matrix is produced
+    with a vectorized splitmix64, so a batch costs a handful of NumPy ops.
     """
-    mode = (settings.embeddings_mode or "mock").lower()
-    if mode != "mock":
-        raise RuntimeError("EMBEDDINGS_MODE=local not implemented in this MVP; use EMBEDDINGS_MODE=mock")
 
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        seeds = np.array(
+            [int(hashlib.sha256(t.encode("utf-8")).hexdigest()[:16], 16) for t in texts],
+            dtype=np.uint64,
+        )
+        with np.errstate(over="ignore"):
+            x = seeds[:, None] + np.uint64(0x9E3779B97F4A7C15) * np.arange(1, self.dim + 1, dtype=np.uint64)
+            x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            x = x ^ (x >> np.uint64(31))
+        # Top 53 bits -> uniform [-1, 1)
+        vec = (x >> np.uint64(11)).astype(np.float64) * (2.0 / float(1 << 53)) - 1.0
+        return _l2_normalize(vec).astype(np.float32)
+
+
+class SentenceTransformerBackend:
+    """
+    Local CPU model via `sentence-transformers` (optional dependency).
+    The default model produces 384-dim vectors, matching the initial migration.
+    """
+
+    def __init__(self, model_name: str, dim: int, batch_size: int) -> None:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError(
+                "EMBEDDINGS_MODE=local requires `sentence-transformers`; install it or use EMBEDDINGS_MODE=mock"
+            ) from e
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = int(self.model.get_sentence_embedding_dimension())
+        if self.dim != dim:
+            raise RuntimeError(f"Embedding model {model_name} produces {self.dim}-dim vectors; VECTOR_DIM={dim}")
+        self.batch_size = batch_size
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        mat = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return np.asarray(mat, dtype=np.float32)
+
+
+@lru_cache(maxsize=1)
+def get_backend() -> EmbeddingBackend:
+    mode = (settings.embeddings_mode or "mock").lower()
     dim = int(settings.vector_dim)
-    seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
-    rng = random.Random(seed)
-    vec = [rng.uniform(-1.0, 1.0) for _ in range(dim)]
-    # L2 normalize for cosine distance
-    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
-    return [v / norm for v in vec]
+    if mode == "mock":
+        return MockEmbeddingBackend(dim)
+    if mode == "local":
+        return SentenceTransformerBackend(settings.embeddings_local_model, dim, settings.embeddings_batch_size)
+    raise RuntimeError(f"Unknown EMBEDDINGS_MODE={mode!r}; use mock|local")
 
+
+def embed_texts(texts: list[str]) -> np.ndarray:
+    """
+    Batch embeddings: returns a float32 (len(texts), vector_dim) matrix of L2-normalized rows.
+    - mock: deterministic pseudo-random vectors
+    - local: sentence-transformers model on CPU
+    """
+    if not texts:
+        return np.zeros((0, int(settings.vector_dim)), dtype=np.float32)
+    return get_backend().embed(list(texts))
+
+
+def embed_text(text: str) -> list[float]:
+    return embed_texts([text])[0].tolist()
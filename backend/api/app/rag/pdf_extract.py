@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+
+from pypdf import PdfReader
+
+from app.config import settings
+from app.process_pool import imap_bounded
+
+
+def _extract_range(task: tuple[str, int, int]) -> list[str]:
+    path, start, stop = task
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_pages(
+    path: str | Path,
+    workers: int | None = None,
+    pages_per_task: int | None = None,
+) -> Iterator[str]:
+    """
+    Yield the text of each page, in order.
+    With `workers` > 1, page ranges are extracted on a process pool; at most
+    2 * workers ranges are in flight so memory stays bounded on huge documents.
+    """
+    path = str(path)
+    workers = settings.pdf_extract_workers if workers is None else workers
+    per_task = max(1, int(pages_per_task or settings.pdf_pages_per_task))
+
+    reader = PdfReader(path)
+    n_pages = len(reader.pages)
+
+    if workers <= 1 or n_pages <= per_task:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+    del reader
+
+    ranges = [(path, start, min(n_pages, start + per_task)) for start in range(0, n_pages, per_task)]
+    for _range, texts in imap_bounded(_extract_range, ranges, workers):
+        yield from texts
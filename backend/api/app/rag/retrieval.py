@@ -1,25 +1,123 @@
 from __future__ import annotations
 
-from sqlalchemy.orm import Session
+from collections.abc import Sequence
+from dataclasses import dataclass
 
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Integer, cast, column, func, select, true, values
+from sqlalchemy.orm import Session, aliased
+
+from app.config import settings
 from app.models import Chunk
 
 
+@dataclass(frozen=True)
+class RetrievalOptions:
+    """
+    - exact: rank every chunk of the upload (btree on upload_id + sort); always returns k rows.
+    - approximate: let the planner use the HNSW/IVFFlat index on `chunks.embedding`.
+      `ef_search` (HNSW) and `probes` (IVFFlat) trade recall for speed. The upload filter is
+      applied after the index scan, so enable `iterative_scan` (pgvector >= 0.8) when an upload
+      is a small slice of the table, otherwise fewer than k rows may come back.
+    """
+
+    mode: str = "exact"  # exact|approximate
+    ef_search: int | None = None
+    probes: int | None = None
+    iterative_scan: bool = False
+
+    @classmethod
+    def from_settings(cls) -> RetrievalOptions:
+        return cls(
+            mode=settings.retrieval_mode,
+            ef_search=settings.retrieval_ef_search,
+            probes=settings.retrieval_probes,
+            iterative_scan=settings.retrieval_iterative_scan,
+        )
+
+
+def _apply_ann_settings(db: Session, options: RetrievalOptions) -> None:
+    # set_config(..., is_local => true) == SET LOCAL: scoped to the current transaction.
+    params: dict[str, str] = {}
+    if options.ef_search:
+        params["hnsw.ef_search"] = str(int(options.ef_search))
+    if options.probes:
+        params["ivfflat.probes"] = str(int(options.probes))
+    if options.iterative_scan:
+        params["hnsw.iterative_scan"] = "relaxed_order"
+        params["ivfflat.iterative_scan"] = "relaxed_order"
+    for name, value in params.items():
+        db.execute(select(func.set_config(name, value, True)))
+
+
 def retrieve_top_k_chunks_for_topic(
     db: Session,
     upload_id,
     query_embedding: list[float],
     k: int = 6,
+    options: RetrievalOptions | None = None,
 ) -> list[Chunk]:
     """
     Lightweight pgvector retrieval. Requires `vector` extension and embeddings stored in `chunks.embedding`.
     """
-    return (
-        db.query(Chunk)
-        .filter(Chunk.upload_id == upload_id)
-        .filter(Chunk.embedding.is_not(None))
-        .order_by(Chunk.embedding.cosine_distance(query_embedding))
+    return retrieve_top_k_chunks_for_topics(db, upload_id, [query_embedding], k=k, options=options)[0]
+
+
+def retrieve_top_k_chunks_for_topics(
+    db: Session,
+    upload_id,
+    query_embeddings: Sequence[Sequence[float]],
+    k: int = 6,
+    options: RetrievalOptions | None = None,
+) -> list[list[Chunk]]:
+    """
+    Top-k chunks for many query embeddings in one round trip: a LATERAL join over a
+    VALUES list of query vectors. Returns one list per query, in input order.
+    """
+    if len(query_embeddings) == 0:
+        return []
+
+    options = options or RetrievalOptions.from_settings()
+    mode = (options.mode or "exact").lower()
+    if mode not in ("exact", "approximate"):
+        raise ValueError(f"Unknown retrieval mode {options.mode!r}; use exact|approximate")
+
+    dim = int(settings.vector_dim)
+    queries = values(column("qi", Integer), column("embedding", Vector(dim)), name="queries").data(
+        [(i, emb) for i, emb in enumerate(query_embeddings)]
+    )
+    query_vec = cast(queries.c.embedding, Vector(dim))
+
+    if mode == "approximate":
+        _apply_ann_settings(db, options)
+        source = Chunk
+    else:
+        # A materialized CTE keeps the planner off the ANN index so ranking is exact,
+        # and the upload's chunks are scanned once for all queries.
+        source = aliased(
+            Chunk,
+            select(Chunk)
+            .where(Chunk.upload_id == upload_id, Chunk.embedding.is_not(None))
+            .cte("candidates")
+            .prefix_with("MATERIALIZED"),
+        )
+
+    top_k = (
+        select(source)
+        .where(source.upload_id == upload_id, source.embedding.is_not(None))
+        .order_by(source.embedding.cosine_distance(query_vec))
         .limit(k)
-        .all()
+        .lateral("top_k")
+    )
+    top = aliased(Chunk, top_k)
+    stmt = (
+        select(queries.c.qi, top)
+        .select_from(queries)
+        .join(top_k, true())
+        .order_by(queries.c.qi, top.embedding.cosine_distance(query_vec))
     )
 
+    out: list[list[Chunk]] = [[] for _ in range(len(query_embeddings))]
+    for qi, chunk in db.execute(stmt):
+        out[qi].append(chunk)
+    return out
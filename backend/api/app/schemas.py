@@ -4,7 +4,7 @@ import uuid
 from datetime import datetime
 from typing import Any, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class TokenResponse(BaseModel):
@@ -74,6 +74,8 @@ class QuizResponse(BaseModel):
 class FeedResponse(BaseModel):
     reels: list[ReelResponse]
     quiz: QuizResponse | None = None
+    next_cursor: str | None = None
+    prefetch_urls: list[str] = Field(default_factory=list)
 
 
 class WatchEventRequest(BaseModel):
@@ -84,6 +86,33 @@ class WatchEventRequest(BaseModel):
     watch_time_sec: float | None = None
 
 
+class BatchEvent(BaseModel):
+    course_id: uuid.UUID
+    reel_id: uuid.UUID | None = None
+    topic_id: uuid.UUID | None = None
+    event_type: Literal["watch", "skip", "replay", "like", "save", "share", "quiz_result"]
+    watch_time_sec: float | None = Field(default=None, ge=0)
+    quiz_id: uuid.UUID | None = None
+    correct: bool | None = None
+    selected: Any | None = None
+
+    @model_validator(mode="after")
+    def _check_quiz_result(self) -> BatchEvent:
+        if self.event_type == "quiz_result" and (
+            self.quiz_id is None or self.topic_id is None or self.correct is None
+        ):
+            raise ValueError("quiz_result events require quiz_id, topic_id and correct")
+        return self
+
+
+class EventBatchRequest(BaseModel):
+    events: list[BatchEvent] = Field(min_length=1, max_length=500)
+
+
+class EventBatchResponse(BaseModel):
+    accepted: int
+
+
 class QuizResultRequest(BaseModel):
     course_id: uuid.UUID
     quiz_id: uuid.UUID
@@ -103,3 +132,16 @@ class ProgressResponse(BaseModel):
     course_id: uuid.UUID
     items: list[ProgressItemResponse]
 
+
+class DueReviewResponse(BaseModel):
+    course_id: uuid.UUID
+    topic_id: uuid.UUID
+    mastery_score: float
+    next_review_at: datetime
+    interval_days: int
+    repetitions: int
+
+
+class DueReviewsResponse(BaseModel):
+    items: list[DueReviewResponse]
+
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import hashlib
+import uuid
+from typing import BinaryIO
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models import ContentBlob, Upload
+from app.storage.s3 import MB, upload_fileobj
+
+
+def sha256_fileobj(fileobj: BinaryIO) -> tuple[str, int]:
+    """Hash a seekable file object in 1 MiB reads; rewinds it afterwards. Returns (hexdigest, size)."""
+    h = hashlib.sha256()
+    size = 0
+    while chunk := fileobj.read(MB):
+        h.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return h.hexdigest(), size
+
+
+def blob_key(sha256: str) -> str:
+    return f"blobs/sha256/{sha256[:2]}/{sha256}"
+
+
+def store_blob(db: Session, fileobj: BinaryIO, content_type: str) -> ContentBlob:
+    """
+    Content-addressed put: the object is uploaded only the first time these bytes are seen.
+    Concurrent first uploads write the same key with the same bytes, so the race is harmless.
+    The caller owns the commit.
+    """
+    sha256, size = sha256_fileobj(fileobj)
+    blob = db.get(ContentBlob, sha256)
+    if blob is not None:
+        return blob
+
+    key = blob_key(sha256)
+    upload_fileobj(object_key=key, fileobj=fileobj, content_type=content_type)
+    db.execute(
+        pg_insert(ContentBlob.__table__)
+        .values(sha256=sha256, object_key=key, size_bytes=size, content_type=content_type)
+        .on_conflict_do_nothing(index_elements=["sha256"])
+    )
+    return db.get(ContentBlob, sha256)
+
+
+def shared_chunk_source(db: Session, upload: Upload) -> uuid.UUID | None:
+    """Id of an earlier upload whose chunks already cover this upload's bytes, if any."""
+    if not upload.content_sha256:
+        return None
+    source = db.scalar(select(ContentBlob.canonical_upload_id).where(ContentBlob.sha256 == upload.content_sha256))
+    return source if source != upload.id else None
+
+
+def claim_canonical(db: Session, upload: Upload) -> None:
+    """Make `upload` the chunk source for its content unless another upload already is."""
+    if not upload.content_sha256:
+        return
+    db.execute(
+        update(ContentBlob)
+        .where(ContentBlob.sha256 == upload.content_sha256, ContentBlob.canonical_upload_id.is_(None))
+        .values(canonical_upload_id=upload.id)
+    )
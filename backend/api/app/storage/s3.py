@@ -1,17 +1,62 @@
 from __future__ import annotations
 
+import os
+import tempfile
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO
+
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
 
+from app.cache import make_cache
 from app.config import settings
 
+MB = 1024 * 1024
+
+
+_client_lock = threading.Lock()
+_client_instance = None
+_client_pid: int | None = None
+
 
 def _client():
-    return boto3.client(
-        "s3",
-        endpoint_url=settings.s3_endpoint_url,
-        region_name=settings.s3_region,
-        aws_access_key_id=settings.s3_access_key_id,
-        aws_secret_access_key=settings.s3_secret_access_key,
+    """
+    Process-wide S3 client. boto3 clients are thread-safe once built, so API threads and
+    worker tasks share one connection pool. Rebuilt after fork so prefork children never
+    reuse a parent's sockets.
+    """
+    global _client_instance, _client_pid
+    pid = os.getpid()
+    if _client_instance is not None and _client_pid == pid:
+        return _client_instance
+    with _client_lock:
+        if _client_instance is None or _client_pid != pid:
+            _client_instance = boto3.session.Session().client(
+                "s3",
+                endpoint_url=settings.s3_endpoint_url,
+                region_name=settings.s3_region,
+                aws_access_key_id=settings.s3_access_key_id,
+                aws_secret_access_key=settings.s3_secret_access_key,
+                config=BotoConfig(
+                    max_pool_connections=int(settings.s3_max_pool_connections),
+                    tcp_keepalive=settings.s3_tcp_keepalive,
+                ),
+            )
+            _client_pid = pid
+    return _client_instance
+
+
+def _transfer_config() -> TransferConfig:
+    part_size = int(settings.s3_multipart_chunk_mb) * MB
+    return TransferConfig(
+        multipart_threshold=part_size,
+        multipart_chunksize=part_size,
+        max_concurrency=int(settings.s3_transfer_concurrency),
+        use_threads=settings.s3_transfer_concurrency > 1,
     )
 
 
@@ -20,6 +65,51 @@ def put_object(object_key: str, data: bytes, content_type: str) -> None:
     c.put_object(Bucket=settings.s3_bucket, Key=object_key, Body=data, ContentType=content_type)
 
 
+def delete_objects(object_keys: list[str]) -> None:
+    """Batch delete (up to 1000 keys per request); missing keys are not an error."""
+    c = _client()
+    for i in range(0, len(object_keys), 1000):
+        batch = [{"Key": k} for k in object_keys[i : i + 1000]]
+        c.delete_objects(Bucket=settings.s3_bucket, Delete={"Objects": batch, "Quiet": True})
+
+
+def upload_file(object_key: str, path: str | Path, content_type: str) -> None:
+    """Multipart upload straight from disk; the file is never read into memory whole."""
+    c = _client()
+    c.upload_file(
+        str(path),
+        settings.s3_bucket,
+        object_key,
+        ExtraArgs={"ContentType": content_type},
+        Config=_transfer_config(),
+    )
+
+
+def upload_fileobj(object_key: str, fileobj: BinaryIO, content_type: str) -> None:
+    """Multipart upload from a readable binary file object (e.g. an UploadFile's spool)."""
+    c = _client()
+    c.upload_fileobj(
+        fileobj,
+        settings.s3_bucket,
+        object_key,
+        ExtraArgs={"ContentType": content_type},
+        Config=_transfer_config(),
+    )
+
+
+@contextmanager
+def download_to_tempfile(object_key: str, suffix: str = "") -> Iterator[Path]:
+    """
+    Download an object (ranged, concurrent parts) into a temp dir and yield its path.
+    The temp dir is removed on exit.
+    """
+    c = _client()
+    with tempfile.TemporaryDirectory(prefix="doomlearn_s3_") as tmp:
+        path = Path(tmp) / f"object{suffix}"
+        c.download_file(settings.s3_bucket, object_key, str(path), Config=_transfer_config())
+        yield path
+
+
 def presign_get_url(object_key: str, expires_seconds: int = 3600) -> str:
     c = _client()
     return c.generate_presigned_url(
@@ -28,3 +118,22 @@ def presign_get_url(object_key: str, expires_seconds: int = 3600) -> str:
         ExpiresIn=expires_seconds,
     )
 
+
+_presign_cache = make_cache("presign", settings.presign_cache_size, settings.presign_cache_backend)
+
+
+def presign_get_url_cached(object_key: str, expires_seconds: int = 3600) -> str:
+    """
+    Presigned GET URL, reused until only `presign_min_remaining_sec` of its validity is left,
+    so a URL handed out always stays valid at least that long.
+    """
+    cache_key = f"{expires_seconds}:{object_key}"
+    url = _presign_cache.get(cache_key)
+    if url is not None:
+        return url
+
+    url = presign_get_url(object_key, expires_seconds=expires_seconds)
+    ttl = expires_seconds - int(settings.presign_min_remaining_sec)
+    if ttl > 0:
+        _presign_cache.set(cache_key, url, ttl)
+    return url
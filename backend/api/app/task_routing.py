@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import Any
+
+from app.config import settings
+
+# Each queue gets its own worker pool (see README): a long encode never holds a slot that
+# ingestion or provider calls are waiting for.
+INGEST = "ingest"  # CPU: PDF extraction, transcription, embeddings (prefork)
+GENERATE = "generate"  # I/O: provider calls, S3 transfers, short DB jobs (threads)
+ENCODE = "encode"  # CPU-heavy, long-running ffmpeg work (prefork, low concurrency)
+
+# Redis broker priorities: 0 is served first.
+PRIORITY_HIGH = 0
+PRIORITY_DEFAULT = 5
+PRIORITY_LOW = 9
+
+TASK_ROUTES = {
+    "worker.tasks.process_upload": {"queue": INGEST},
+    "worker.tasks.generate_topic_reel": {"queue": GENERATE},
+    "worker.tasks.render_topic_reel": {"queue": ENCODE},
+    "worker.tasks.finalize_upload": {"queue": GENERATE},
+    "worker.tasks.flush_feed_events": {"queue": GENERATE},
+    "worker.tasks.prune_generation_cache": {"queue": GENERATE},
+}
+
+
+def celery_config() -> dict[str, Any]:
+    """Routing and delivery settings shared by the worker app and the API's task client."""
+    return {
+        "task_routes": TASK_ROUTES,
+        "task_default_queue": GENERATE,
+        "task_default_priority": PRIORITY_DEFAULT,
+        "broker_transport_options": {
+            "queue_order_strategy": "priority",
+            "priority_steps": list(range(10)),
+            "sep": ":",
+            # Late-acked tasks are redelivered once this expires: keep it above the longest task.
+            "visibility_timeout": settings.celery_visibility_timeout_sec,
+        },
+    }
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any
+
+from redis.exceptions import ResponseError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.cache import get_redis
+from app.feed.queue import refresh_topic
+from app.models import Course, FeedEvent, FeedEventType, Reel, Topic, User
+from app.progress.scheduler import quiz_quality
+from app.progress.service import apply_mastery_deltas, quiz_delta, watch_delta
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "doomlearn:feed_events"
+GROUP = "feed-event-writers"
+
+# Stream message ids are unique, so deriving the FeedEvent id from them makes
+# re-delivered messages (consumer crashed before XACK) no-ops on insert.
+_EVENT_ID_NAMESPACE = uuid.UUID("6f1c2a52-4f0e-4a8e-9a43-2a0f5d0f8e11")
+
+
+def append_events(user_id: uuid.UUID, events: list[dict[str, Any]], maxlen: int) -> None:
+    """Buffer validated events on the Redis stream; one pipelined round trip per batch."""
+    received_at = datetime.now(timezone.utc).isoformat()
+    pipe = get_redis().pipeline(transaction=False)
+    for e in events:
+        record = {**e, "user_id": str(user_id), "received_at": received_at}
+        pipe.xadd(STREAM_KEY, {"e": json.dumps(record, default=str)}, maxlen=maxlen, approximate=True)
+    pipe.execute()
+
+
+def mastery_delta(event: dict[str, Any]) -> float | None:
+    if event["event_type"] == FeedEventType.watch.value and event.get("watch_time_sec") is not None:
+        return watch_delta(float(event["watch_time_sec"]))
+    if event["event_type"] == FeedEventType.quiz_result.value:
+        return quiz_delta(bool(event.get("correct")))
+    return None
+
+
+def review_quality(event: dict[str, Any]) -> int | None:
+    if event["event_type"] == FeedEventType.quiz_result.value:
+        return quiz_quality(bool(event.get("correct")))
+    return None
+
+
+def _ensure_group(r) -> None:
+    try:
+        r.xgroup_create(STREAM_KEY, GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def _read(r, consumer: str, count: int, min_idle_ms: int) -> list[tuple[str, dict]]:
+    # Reclaim messages a dead consumer read but never acknowledged, then read new ones.
+    _, claimed, *_ = r.xautoclaim(STREAM_KEY, GROUP, consumer, min_idle_time=min_idle_ms, count=count)
+    messages = list(claimed)
+    if len(messages) < count:
+        for _, batch in r.xreadgroup(GROUP, consumer, {STREAM_KEY: ">"}, count=count - len(messages)) or []:
+            messages.extend(batch)
+    return [(msg_id, fields) for msg_id, fields in messages if fields]
+
+
+def _row(msg_id: str, fields: dict) -> dict[str, Any]:
+    e = json.loads(fields["e"])
+    payload = None
+    if e["event_type"] == FeedEventType.quiz_result.value:
+        payload = {"correct": e.get("correct"), "selected": e.get("selected"), "quiz_id": e.get("quiz_id")}
+    return {
+        "id": uuid.uuid5(_EVENT_ID_NAMESPACE, msg_id),
+        "user_id": uuid.UUID(e["user_id"]),
+        "course_id": uuid.UUID(e["course_id"]),
+        "reel_id": uuid.UUID(e["reel_id"]) if e.get("reel_id") else None,
+        "topic_id": uuid.UUID(e["topic_id"]) if e.get("topic_id") else None,
+        "event_type": FeedEventType(e["event_type"]),
+        "watch_time_sec": e.get("watch_time_sec"),
+        "payload_json": payload,
+        "created_at": datetime.fromisoformat(e["received_at"]),
+        "_event": e,
+    }
+
+
+def _with_existing_refs(db: Session, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Ids are checked at /events/batch, but a reel or topic can be deleted before the drain;
+    # one dangling FK would otherwise fail the whole bulk insert on every redelivery.
+    known = {}
+    for col, model in (("user_id", User), ("course_id", Course), ("reel_id", Reel), ("topic_id", Topic)):
+        ids = {row[col] for row in rows if row[col] is not None}
+        known[col] = set(db.scalars(select(model.id).where(model.id.in_(ids)))) if ids else set()
+    return [row for row in rows if all(row[col] is None or row[col] in ids for col, ids in known.items())]
+
+
+def drain(db: Session, batch_size: int = 1000, min_idle_ms: int = 60_000) -> int:
+    """
+    Move one batch of buffered events into Postgres: a bulk INSERT into feed_events and one
+    UPSERT row per (user, course, topic) with the summed mastery delta; the latest quiz result
+    in the batch is the SM-2 review for that topic. Messages are ACKed only
+    after the commit; malformed events and events whose course, reel or topic no longer
+    exists are dropped (and ACKed) so they cannot block the stream.
+    Returns the number of messages processed.
+    """
+    r = get_redis()
+    _ensure_group(r)
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    messages = _read(r, consumer, batch_size, min_idle_ms)
+    if not messages:
+        return 0
+
+    rows = []
+    for msg_id, fields in messages:
+        try:
+            rows.append(_row(msg_id, fields))
+        except (KeyError, TypeError, ValueError):
+            logger.warning("dropping malformed feed event %s", msg_id, exc_info=True)
+    valid = _with_existing_refs(db, rows)
+    if len(valid) < len(rows):
+        logger.warning("dropping %d feed events that reference deleted rows", len(rows) - len(valid))
+    rows = valid
+
+    table = FeedEvent.__table__
+    inserted = set()
+    if rows:
+        inserted = set(
+            db.scalars(
+                pg_insert(table)
+                .on_conflict_do_nothing(index_elements=["id"])
+                .returning(table.c.id),
+                [{k: v for k, v in row.items() if k != "_event"} for row in rows],
+            )
+        )
+
+    # Fold mastery deltas of newly inserted events only (re-deliveries were already applied).
+    deltas: dict[tuple[str, str, str], tuple[float, datetime, int | None]] = {}
+    for row in rows:
+        e = row["_event"]
+        delta = mastery_delta(e)
+        if row["id"] not in inserted or delta is None or not e.get("topic_id"):
+            continue
+        key = (e["user_id"], e["course_id"], e["topic_id"])
+        prev_delta, prev_seen, prev_quality = deltas.get(key, (0.0, row["created_at"], None))
+        quality = review_quality(e)
+        deltas[key] = (
+            prev_delta + delta,
+            max(prev_seen, row["created_at"]),
+            prev_quality if quality is None else quality,
+        )
+    apply_mastery_deltas(
+        db,
+        (
+            (uuid.UUID(user_id), uuid.UUID(course_id), uuid.UUID(topic_id), delta, seen_at, quality)
+            for (user_id, course_id, topic_id), (delta, seen_at, quality) in deltas.items()
+        ),
+    )
+
+    db.commit()
+    r.xack(STREAM_KEY, GROUP, *[msg_id for msg_id, _ in messages])
+
+    touched: dict[tuple[str, str], set[str]] = defaultdict(set)
+    for user_id, course_id, topic_id in deltas:
+        touched[(user_id, course_id)].add(topic_id)
+    for (user_id, course_id), topic_ids in touched.items():
+        for topic_id in topic_ids:
+            refresh_topic(db, uuid.UUID(user_id), uuid.UUID(course_id), uuid.UUID(topic_id))
+    return len(messages)
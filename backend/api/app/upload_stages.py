@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import uuid
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models import StageStatus, UploadStage
+
+CHUNKS = "chunks"  # extract + chunk + embed, committed together with the chunk rows
+PACKS = "packs"  # per-topic retrieval results handed to the generation subtasks
+
+
+def reel_stage(topic_id: uuid.UUID | str) -> str:
+    return f"reel:{topic_id}"
+
+
+def completed(db: Session, upload_id: uuid.UUID, name: str) -> dict[str, Any] | None:
+    """The stage's result if it is done (an empty dict when it stored none), else None."""
+    row = db.execute(
+        select(UploadStage.status, UploadStage.result_json).where(
+            UploadStage.upload_id == upload_id, UploadStage.name == name
+        )
+    ).one_or_none()
+    if row is None or row.status != StageStatus.done:
+        return None
+    return row.result_json or {}
+
+
+def start(db: Session, upload_id: uuid.UUID, name: str) -> None:
+    """Record an attempt at a stage. The caller owns the commit."""
+    stmt = pg_insert(UploadStage.__table__).values(
+        upload_id=upload_id, name=name, status=StageStatus.running, attempts=1
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["upload_id", "name"],
+            set_={"status": StageStatus.running, "attempts": UploadStage.__table__.c.attempts + 1, "error": None},
+            where=UploadStage.__table__.c.status != StageStatus.done,
+        )
+    )
+
+
+def finish(db: Session, upload_id: uuid.UUID, name: str, result: dict[str, Any] | None = None) -> bool:
+    """
+    Mark a stage done inside the transaction that writes its output. Returns False when a
+    concurrent delivery of the same task got there first; the caller should then roll back.
+    """
+    table = UploadStage.__table__
+    stmt = pg_insert(table).values(
+        upload_id=upload_id, name=name, status=StageStatus.done, attempts=1, result_json=result
+    )
+    done = db.scalar(
+        stmt.on_conflict_do_update(
+            index_elements=["upload_id", "name"],
+            set_={"status": StageStatus.done, "result_json": result, "error": None},
+            where=table.c.status != StageStatus.done,
+        ).returning(table.c.name)
+    )
+    return done is not None
+
+
+def fail(upload_id: uuid.UUID, name: str, error: str) -> None:
+    """Record a failed attempt on its own session (the task's transaction was rolled back)."""
+    table = UploadStage.__table__
+    stmt = pg_insert(table).values(upload_id=upload_id, name=name, status=StageStatus.failed, error=error[:2000])
+    with SessionLocal() as db:
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["upload_id", "name"],
+                set_={"status": StageStatus.failed, "error": stmt.excluded.error},
+                where=table.c.status != StageStatus.done,
+            )
+        )
+        db.commit()
+
+
+def summary(db: Session, upload_id: uuid.UUID) -> dict[str, str]:
+    """Stage name -> status, for upload metadata and debugging."""
+    rows = db.execute(
+        select(UploadStage.name, UploadStage.status).where(UploadStage.upload_id == upload_id)
+    ).all()
+    return {name: status.value for name, status in rows}
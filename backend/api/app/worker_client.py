@@ -3,6 +3,7 @@ from __future__ import annotations
 from celery import Celery
 
 from app.config import settings
+from app.task_routing import celery_config
 
 
 celery_client = Celery(
@@ -10,6 +11,8 @@ celery_client = Celery(
     broker=settings.redis_url,
     backend=settings.redis_url,
 )
+# Same routes and priority levels as the worker, so send_task lands on the right queue.
+celery_client.conf.update(**celery_config())
 
 
 def enqueue_process_upload(upload_id: str) -> None:
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from app.rag.chunking import chunk_text, count_tokens, iter_chunks, iter_timed_chunks
+
+
+@dataclass(frozen=True)
+class Segment:
+    text: str
+    start_sec: float
+    end_sec: float
+
+
+def _sentences(n: int, word: str = "alpha") -> str:
+    return " ".join(f"Sentence {i} talks about {word} and more." for i in range(n))
+
+
+def test_count_tokens_counts_words_and_punctuation():
+    assert count_tokens("Hello, world!") == 4
+    assert count_tokens("Hello, world!", 7) == 2
+    assert count_tokens("") == 0
+
+
+def test_empty_text_has_no_chunks():
+    assert chunk_text("") == []
+    assert chunk_text("  \n\n ") == []
+    assert list(iter_chunks([])) == []
+
+
+def test_short_text_is_one_chunk():
+    chunks = chunk_text("One short sentence.", target_tokens=50)
+    assert [c.text for c in chunks] == ["One short sentence."]
+    assert (chunks[0].page, chunks[0].start, chunks[0].page_end, chunks[0].end) == (1, 0, 1, 19)
+
+
+def test_chunks_stay_within_budget_and_cut_at_sentences():
+    text = _sentences(30)
+    chunks = chunk_text(text, target_tokens=40, overlap_tokens=0)
+    assert len(chunks) > 1
+    for c in chunks:
+        assert count_tokens(c.text) <= 40
+        assert c.text.startswith("Sentence") and c.text.endswith(".")
+    # Without overlap the chunks tile the text.
+    assert " ".join(c.text for c in chunks) == text
+
+
+def test_offsets_slice_the_chunk_text_from_its_page():
+    pages = [_sentences(12, "limits"), "", _sentences(12, "derivatives")]
+    for c in iter_chunks(pages, target_tokens=30, overlap_tokens=8):
+        if c.page == c.page_end:
+            assert pages[c.page - 1][c.start : c.end] == c.text
+        else:
+            assert c.text.startswith(pages[c.page - 1][c.start :])
+            assert c.text.endswith(pages[c.page_end - 1][: c.end])
+
+
+def test_chunk_spanning_pages_joins_them_with_a_blank_line():
+    chunks = list(iter_chunks(["First page ends here.", "Second page starts here."], target_tokens=50))
+    assert [c.text for c in chunks] == ["First page ends here.\n\nSecond page starts here."]
+    assert (chunks[0].page, chunks[0].page_end) == (1, 2)
+
+
+def test_overlap_repeats_trailing_sentences():
+    chunks = chunk_text(_sentences(20), target_tokens=40, overlap_tokens=10)
+    for prev, nxt in zip(chunks, chunks[1:]):
+        last_sentence = prev.text.rsplit(". ", 1)[-1]
+        assert nxt.text.startswith(last_sentence.rstrip("."))
+
+
+def test_overlong_sentence_is_split_at_words():
+    text = " ".join(f"w{i}" for i in range(100)) + "."
+    chunks = chunk_text(text, target_tokens=20, overlap_tokens=0)
+    assert len(chunks) > 1
+    assert all(count_tokens(c.text) <= 20 for c in chunks)
+    assert " ".join(c.text for c in chunks) == text
+
+
+def test_heading_starts_a_chunk_and_is_never_left_at_the_end():
+    text = (
+        f"INTRODUCTION\n{_sentences(3, 'limits')}\n\n"
+        f"2. Derivatives\n{_sentences(3, 'slopes')}\n\n"
+        f"## Integrals\n{_sentences(3, 'areas')}"
+    )
+    chunks = chunk_text(text, target_tokens=40, overlap_tokens=10)
+    starts = [c.text.split("\n", 1)[0] for c in chunks]
+    for heading in ("INTRODUCTION", "2. Derivatives", "## Integrals"):
+        assert heading in starts
+    for c in chunks:
+        assert not c.text.rstrip().endswith(("INTRODUCTION", "Derivatives", "Integrals"))
+
+
+def test_overlap_never_crosses_a_heading():
+    text = f"{_sentences(4, 'limits')}\n\nDERIVATIVES\n{_sentences(6, 'slopes')}"
+    chunks = chunk_text(text, target_tokens=40, overlap_tokens=20)
+    assert chunks[1].text.startswith("DERIVATIVES")
+    assert not any("limits" in c.text and "slopes" in c.text for c in chunks)
+
+
+def test_sentence_like_first_line_is_not_a_heading():
+    text = f"This line ends a sentence.\n{_sentences(10)}"
+    chunks = chunk_text(text, target_tokens=30, overlap_tokens=0)
+    assert chunks[0].text.startswith("This line ends a sentence.\nSentence 0")
+
+
+def test_timed_chunks_keep_segment_time_ranges():
+    segments = [Segment(f"Part {i} of the lecture is here.", i * 5.0, i * 5.0 + 4.5) for i in range(12)]
+    chunks = list(iter_timed_chunks(segments, target_tokens=20, overlap_tokens=0))
+    assert len(chunks) > 1
+    for c in chunks:
+        assert count_tokens(c.text) <= 20
+        first = next(s for s in segments if c.text.startswith(s.text))
+        last = next(s for s in segments if c.text.endswith(s.text))
+        assert (c.start_sec, c.end_sec) == (first.start_sec, last.end_sec)
+        assert c.page is None and c.start is None
+    assert " ".join(c.text for c in chunks) == " ".join(s.text for s in segments)
+
+
+def test_timed_chunks_prefer_cutting_after_a_sentence():
+    segments = [
+        Segment("The limit of a function", 0.0, 1.0),
+        Segment("describes its behaviour.", 1.0, 2.0),
+        Segment("It is written with lim", 2.0, 3.0),
+        Segment("and an arrow.", 3.0, 4.0),
+        Segment("Continuity uses limits", 4.0, 5.0),
+        Segment("at every point.", 5.0, 6.0),
+    ]
+    chunks = list(iter_timed_chunks(segments, target_tokens=12, overlap_tokens=0))
+    assert all(c.text.endswith(".") for c in chunks)
+
+
+def test_timed_chunks_skip_blank_segments():
+    segments = [Segment("  ", 0.0, 1.0), Segment("Only words.", 1.0, 2.0), Segment("", 2.0, 3.0)]
+    chunks = list(iter_timed_chunks(segments, target_tokens=20))
+    assert [(c.text, c.start_sec, c.end_sec) for c in chunks] == [("Only words.", 1.0, 2.0)]
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+import app.api.feed as feed  # noqa: E402
+import app.cache as cache  # noqa: E402
+from app.feed.queue import store_queue  # noqa: E402
+from app.feed.ranking import RankedReel  # noqa: E402
+
+USER_ID = uuid.uuid4()
+COURSE_ID = uuid.uuid4()
+
+
+def _reels(n: int) -> list[RankedReel]:
+    return [
+        RankedReel(
+            reel=SimpleNamespace(
+                id=uuid.uuid4(),
+                topic_id=uuid.uuid4(),
+                video_object_key=f"reels/{i}.mp4",
+                captions_vtt=None,
+                duration_sec=30,
+            ),
+            score=float(n - i),
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def rebuilds(monkeypatch):
+    monkeypatch.setattr(cache, "_redis_client", fakeredis.FakeRedis(decode_responses=True))
+    monkeypatch.setattr(feed, "presign_get_url_cached", lambda key: f"https://cdn/{key}")
+    calls = []
+
+    def fake_rebuild(ranked):
+        def rebuild(db, user_id, course_id):
+            calls.append(course_id)
+            return store_queue(user_id, course_id, ranked, None)
+
+        return rebuild
+
+    def use(ranked):
+        monkeypatch.setattr(feed, "rebuild_queue", fake_rebuild(ranked))
+        return calls
+
+    return use
+
+
+def _page(rebuild: bool):
+    return feed._ranked_page(None, USER_ID, COURSE_ID, limit=5, prefetch=3, rebuild=rebuild)
+
+
+def test_course_with_fewer_reels_than_limit_has_one_page(rebuilds):
+    calls = rebuilds(_reels(2))
+    first = _page(rebuild=True)
+    assert len(first.reels) == 2
+    assert first.next_cursor is None and first.prefetch_urls == []
+
+    # A client that still sends the ranked cursor gets an empty page, not the same reels again.
+    again = _page(rebuild=False)
+    assert again.reels == [] and again.next_cursor is None
+    assert calls == [COURSE_ID]
+
+
+def test_ranked_pages_end_when_the_queue_drains(rebuilds):
+    calls = rebuilds(_reels(7))
+    first = _page(rebuild=True)
+    assert len(first.reels) == 5 and first.next_cursor == feed.RANKED_CURSOR
+    assert first.prefetch_urls == ["https://cdn/reels/5.mp4", "https://cdn/reels/6.mp4"]
+
+    second = _page(rebuild=False)
+    assert len(second.reels) == 2 and second.next_cursor is None
+    assert {r.id for r in first.reels}.isdisjoint(r.id for r in second.reels)
+    assert calls == [COURSE_ID]
+
+    # Starting over (no cursor) re-ranks the course.
+    assert len(_page(rebuild=True).reels) == 5
+    assert calls == [COURSE_ID, COURSE_ID]
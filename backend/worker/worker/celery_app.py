@@ -15,6 +15,7 @@ if API_DIR not in sys.path:
 load_dotenv(".env")
 
 from app.config import settings  # noqa: E402
+from app.task_routing import PRIORITY_HIGH, PRIORITY_LOW, celery_config  # noqa: E402
 
 
 celery_app = Celery(
@@ -29,6 +30,22 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # Queues, routes and priorities (README: one worker pool per queue).
+    **celery_config(),
+    # Reserve one task at a time, so a long encode never holds queued tasks another worker could run.
+    worker_prefetch_multiplier=1,
+    beat_schedule={
+        "flush-feed-events": {
+            "task": "worker.tasks.flush_feed_events",
+            "schedule": settings.event_flush_interval_sec,
+            "options": {"expires": settings.event_flush_interval_sec * 5, "priority": PRIORITY_HIGH},
+        },
+        "prune-generation-cache": {
+            "task": "worker.tasks.prune_generation_cache",
+            "schedule": 6 * 3600,
+            "options": {"priority": PRIORITY_LOW},
+        },
+    },
 )
 
 celery_app.autodiscover_tasks(["worker.tasks"])
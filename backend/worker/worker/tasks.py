@@ -1,26 +1,39 @@
 from __future__ import annotations
 
-import os
 import subprocess
 import tempfile
 import uuid
+from contextlib import ExitStack
+from dataclasses import asdict
 from datetime import datetime, timezone
 from pathlib import Path
 
+from botocore.exceptions import BotoCoreError, ClientError
+from celery import chord
 from celery.utils.log import get_task_logger
-from pypdf import PdfReader
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from celery.utils.time import get_exponential_backoff_interval
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+from sqlalchemy import delete
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
 
 from worker.celery_app import celery_app
 
 # Imports from backend/api/app via sys.path injection (see celery_app.py)
+from app import upload_stages as stages  # noqa: E402
 from app.config import settings  # noqa: E402
+from app.db import SessionLocal  # noqa: E402
+from app.feed.queue import invalidate_course  # noqa: E402
+from app.generation_cache import cached_json, cached_media, cached_media_entry, prune as prune_cache  # noqa: E402
+from app.media.clips import ClipError, TimeRange, cut_clip_reel, select_ranges  # noqa: E402
+from app.media.compose import EncodeOptions, compose_reel  # noqa: E402
+from app.media.transcribe import iter_transcript  # noqa: E402
 from app.minimax_client import (  # noqa: E402
     minimax_llm_generate_concepts,
+    minimax_music_generate,
     minimax_tts_generate_voice,
     minimax_video_generate,
 )
+from app.minimax_http import MinimaxHTTPError  # noqa: E402
 from app.models import (  # noqa: E402
     Chunk,
     Course,
@@ -31,45 +44,21 @@ from app.models import (  # noqa: E402
     Upload,
     UploadStatus,
     UploadType,
-    UserProgress,
 )
-from app.rag.chunking import chunk_text  # noqa: E402
-from app.rag.embeddings import embed_text  # noqa: E402
-from app.rag.prompt_pack import build_prompt_pack  # noqa: E402
-from app.rag.retrieval import retrieve_top_k_chunks_for_topic  # noqa: E402
-from app.storage.s3 import put_object  # noqa: E402
+from app.progress.service import ensure_progress  # noqa: E402
+from app.rag.chunk_store import write_chunks  # noqa: E402
+from app.rag.chunking import iter_chunks, iter_timed_chunks  # noqa: E402
+from app.rag.embeddings import embed_texts  # noqa: E402
+from app.rag.pdf_extract import iter_pdf_pages  # noqa: E402
+from app.rag.prompt_pack import PromptPack, build_prompt_pack  # noqa: E402
+from app.rag.retrieval import retrieve_top_k_chunks_for_topics  # noqa: E402
+from app.storage.blobs import claim_canonical, shared_chunk_source  # noqa: E402
+from app.storage.s3 import delete_objects, download_to_tempfile, presign_get_url  # noqa: E402
+from app.task_routing import PRIORITY_DEFAULT, PRIORITY_HIGH  # noqa: E402
+from app.telemetry.buffer import drain as drain_events  # noqa: E402
 
 logger = get_task_logger(__name__)
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
-
-
-def _download_upload_bytes(upload: Upload) -> bytes:
-    import boto3
-
-    c = boto3.client(
-        "s3",
-        endpoint_url=settings.s3_endpoint_url,
-        region_name=settings.s3_region,
-        aws_access_key_id=settings.s3_access_key_id,
-        aws_secret_access_key=settings.s3_secret_access_key,
-    )
-    obj = c.get_object(Bucket=settings.s3_bucket, Key=upload.object_key)
-    return obj["Body"].read()
-
-
-def _extract_pdf_text(pdf_bytes: bytes) -> str:
-    fd, path = tempfile.mkstemp(prefix="doomlearn_pdf_", suffix=".pdf")
-    os.close(fd)
-    Path(path).write_bytes(pdf_bytes)
-    reader = PdfReader(path)
-    parts = []
-    for p in reader.pages:
-        t = p.extract_text() or ""
-        parts.append(t)
-    return "\n\n".join(parts)
-
 
 def _make_vtt_from_script(script_lines: list[str]) -> str:
     # Very simple WebVTT: each line gets ~3 seconds.
@@ -104,9 +93,186 @@ def _concat_script(reel_script: dict) -> list[str]:
     return [l for l in lines if l.strip()]
 
 
-@celery_app.task(name="worker.tasks.process_upload")
-def process_upload(upload_id: str) -> dict:
+def _generate_assets(spec: dict) -> dict[str, str | None]:
+    """
+    Generate the provider media for one reel (voice, video segment, optional music) and
+    upload each to the generation cache. Network-bound only; returns their object keys.
+    """
+    duration = spec["duration_sec"]
+    with tempfile.TemporaryDirectory(prefix="doomlearn_assets_") as workdir:
+        voice = cached_media(
+            "tts",
+            {"script": spec["script"], "voice_style": spec["voice_style"]},
+            lambda: minimax_tts_generate_voice(spec["script"], voice_style=spec["voice_style"], out_dir=workdir),
+        )
+        segment = cached_media(
+            "video",
+            {"prompt": spec["video_prompt"], "duration_sec": duration},
+            lambda: minimax_video_generate(
+                prompt=spec["video_prompt"], assets={"duration_sec": duration}, out_dir=workdir
+            ),
+        )
+        music = None
+        if spec["music_mood"]:
+            music = cached_media(
+                "music",
+                {"mood": spec["music_mood"], "duration_sec": duration},
+                lambda: minimax_music_generate(spec["music_mood"], duration, out_dir=workdir),
+            )
+    return {"voice": voice, "segment": segment, "music": music}
+
+
+def _render_reel(spec: dict, assets: dict[str, str | None], workdir: str) -> str:
+    """Download the reel's generated media and compose it in `workdir`; returns the output path."""
+    with ExitStack() as stack:
+        local = {
+            name: str(stack.enter_context(download_to_tempfile(key, suffix=Path(key).suffix)))
+            for name, key in assets.items()
+            if key
+        }
+        out = compose_reel(
+            [local["segment"]],
+            Path(workdir) / "reel.mp4",
+            voice_path=local.get("voice"),
+            music_path=local.get("music"),
+            captions_vtt=spec["captions_vtt"],
+            duration_sec=spec["duration_sec"],
+            options=EncodeOptions(**spec["encode"]),
+        )
+    return str(out)
+
+
+def _compose_cached(spec: dict, assets: dict[str, str | None]) -> str:
+    with tempfile.TemporaryDirectory(prefix="doomlearn_reel_") as workdir:
+        return cached_media(
+            "reel", spec, lambda: _render_reel(spec, assets, workdir), suffix=".mp4", content_type="video/mp4"
+        )
+
+
+def _render_clip(source_key: str, ranges: list[TimeRange], encode: dict, workdir: str) -> tuple[str, dict]:
+    """Cut a clip reel from the uploaded video; ffmpeg fetches only the byte ranges it needs."""
+    clip = cut_clip_reel(
+        presign_get_url(source_key), ranges, Path(workdir) / "clip.mp4", options=EncodeOptions(**encode)
+    )
+    return str(clip.path), {"duration_sec": clip.duration_sec}
+
+
+def _mark_upload_failed(db, upload_id: str) -> None:
+    try:
+        upload = db.query(Upload).filter(Upload.id == uuid.UUID(upload_id)).one_or_none()
+        if upload is not None:
+            upload.status = UploadStatus.failed
+            db.commit()
+    except Exception:
+        pass
+
+
+def _record_stage_failure(upload_id: str, stage: str, exc: Exception) -> None:
+    # Best effort: when the database is what failed, this fails too, and the retry matters more.
+    try:
+        stages.fail(uuid.UUID(upload_id), stage, str(exc))
+    except Exception:
+        logger.warning("could not record failure of stage %s", stage, exc_info=True)
+
+
+# Worth a task-level retry: the database, S3 or Redis hiccuped.
+# PoolTimeoutError: every pooled DB connection was checked out (see DB_POOL_SIZE).
+TRANSIENT_ERRORS = (OperationalError, PoolTimeoutError, BotoCoreError, RedisConnectionError, RedisTimeoutError)
+# S3 throttling and server errors arrive as ClientError responses.
+S3_RETRY_CODES = {"SlowDown", "InternalError", "ServiceUnavailable", "RequestTimeout", "Throttling"}
+S3_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def _is_transient(exc: BaseException | None) -> bool:
+    # Provider errors arrive wrapped (e.g. MinimaxClientError from MinimaxHTTPError): walk the chain.
+    while exc is not None:
+        if isinstance(exc, MinimaxHTTPError):
+            return exc.retryable
+        if isinstance(exc, TRANSIENT_ERRORS):
+            return True
+        if isinstance(exc, ClientError):
+            error = exc.response.get("Error") or {}
+            status = (exc.response.get("ResponseMetadata") or {}).get("HTTPStatusCode")
+            return error.get("Code") in S3_RETRY_CODES or status in S3_RETRY_STATUS
+        exc = exc.__cause__
+    return False
+
+
+def _retry_if_transient(task, exc: Exception) -> None:
+    """Re-raise `exc` as a Celery retry with jittered exponential backoff while retries remain."""
+    if _is_transient(exc) and task.request.retries < task.max_retries:
+        countdown = get_exponential_backoff_interval(
+            factor=settings.task_retry_backoff_sec,
+            retries=task.request.retries,
+            maximum=settings.task_retry_backoff_max_sec,
+            full_jitter=True,
+        )
+        logger.warning("transient failure, retrying in %ss: %s", countdown, exc)
+        raise task.retry(exc=exc, countdown=countdown)
+
+
+def _ingest_chunks(db, upload: Upload) -> uuid.UUID:
+    """
+    Download, extract, chunk and embed `upload`; returns the id of the upload whose chunks
+    cover its content. The caller commits, together with the stage checkpoint.
+    """
+    # Same bytes already ingested by another upload: reuse its chunks and embeddings.
+    source_id = shared_chunk_source(db, upload)
+    if source_id is not None:
+        logger.info("upload %s: reusing chunks of upload %s", upload.id, source_id)
+        return source_id
+
+    # Rows committed by an attempt that predates stage checkpoints would be duplicated.
+    db.execute(delete(Chunk).where(Chunk.upload_id == upload.id))
+    # Streamed to a temp file that is removed once chunks are stored.
+    with download_to_tempfile(upload.object_key, suffix=f".{upload.type.value}") as path:
+        if upload.type == UploadType.pdf:
+            n_chunks = write_chunks(db, upload.id, iter_chunks(iter_pdf_pages(path)))
+        else:
+            # Time-aligned transcript chunks (start_sec/end_sec) for clip reels.
+            n_chunks = write_chunks(db, upload.id, iter_timed_chunks(iter_transcript(path)))
+    claim_canonical(db, upload)
+    logger.info("upload %s: stored %d chunks", upload.id, n_chunks)
+    return upload.id
+
+
+def _topic_jobs(db, upload: Upload, topics: list[Topic], chunk_source_id: uuid.UUID) -> list[dict]:
+    """Arguments of each topic's `generate_topic_reel` subtask (JSON, stored with the checkpoint)."""
+    # Retrieve top-k chunks for every topic in one round trip, then hand each
+    # subtask its prompt-pack facts.
+    q_embs = embed_texts([t.title for t in topics])
+    top_chunks = retrieve_top_k_chunks_for_topics(db, chunk_source_id, q_embs, k=6)
+    clips = upload.type == UploadType.video and settings.reel_clip_enabled
+    return [
+        {
+            "topic_id": str(t.id),
+            "facts": build_prompt_pack(t.title, [c.text for c in chs]).facts,
+            # Video uploads: the retrieved chunks' timestamps (best first) become clip reels.
+            "clip_ranges": [
+                [c.start_sec, c.end_sec] for c in chs if clips and c.start_sec is not None and c.end_sec is not None
+            ],
+        }
+        for t, chs in zip(topics, top_chunks)
+    ]
+
+
+@celery_app.task(
+    name="worker.tasks.process_upload",
+    bind=True,
+    max_retries=settings.task_max_retries,
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
+def process_upload(self, upload_id: str) -> dict:
+    """
+    Ingestion stage: download, extract, chunk and embed the upload, then fan out one
+    `generate_topic_reel` -> `render_topic_reel` chain per leaf topic. `finalize_upload` runs once
+    every topic has finished and settles the upload status.
+    Each step is checkpointed (see app.upload_stages): a retry after a transient failure
+    resumes after the last completed step instead of starting over.
+    """
     db = SessionLocal()
+    stage = None
     try:
         upload = db.query(Upload).filter(Upload.id == uuid.UUID(upload_id)).one_or_none()
         if upload is None:
@@ -120,96 +286,311 @@ def process_upload(upload_id: str) -> dict:
             .all()
         )
 
-        raw = _download_upload_bytes(upload)
+        stage = stages.CHUNKS
+        done = stages.completed(db, upload.id, stage)
+        if done is None:
+            stages.start(db, upload.id, stage)
+            db.commit()
+            done = {"chunk_source_id": str(_ingest_chunks(db, upload))}
+            stages.finish(db, upload.id, stage, done)
+            db.commit()
+        chunk_source_id = uuid.UUID(done["chunk_source_id"])
 
-        if upload.type == UploadType.pdf:
-            text = _extract_pdf_text(raw)
-        else:
-            # MVP: video transcription can be added here.
-            text = "Transcript placeholder (video ASR not implemented in MVP)."
+        topics = leaf_topics[: max(1, min(len(leaf_topics), 8))]
+        if not topics:
+            upload.status = UploadStatus.ready
+            db.commit()
+            return {"ok": True, "upload_id": upload_id, "topics": 0}
 
-        chunks = chunk_text(text)
-        for ch in chunks:
-            emb = embed_text(ch.text)
-            db.add(Chunk(upload_id=upload.id, topic_id=None, text=ch.text, embedding=emb))
+        stage = stages.PACKS
+        done = stages.completed(db, upload.id, stage)
+        if done is None:
+            stages.start(db, upload.id, stage)
+            db.commit()
+            done = {"topics": _topic_jobs(db, upload, topics, chunk_source_id)}
+            stages.finish(db, upload.id, stage, done)
+            db.commit()
+        jobs = done["topics"]
+
+        # One generate -> render chain per topic; both steps skip topics whose reel stage is
+        # already done. The first topic jumps the queues so a new upload shows a reel early.
+        chord(
+            generate_topic_reel.s(upload_id, j["topic_id"], j["facts"], j["clip_ranges"]).set(priority=p)
+            | render_topic_reel.s().set(priority=p)
+            for j, p in zip(jobs, [PRIORITY_HIGH] + [PRIORITY_DEFAULT] * (len(jobs) - 1))
+        )(finalize_upload.s(upload_id))
+        return {"ok": True, "upload_id": upload_id, "topics": len(jobs)}
+    except Exception as e:
+        db.rollback()
+        if stage is not None:
+            _record_stage_failure(upload_id, stage, e)
+        _retry_if_transient(self, e)
+        logger.exception("process_upload failed")
+        _mark_upload_failed(db, upload_id)
+        return {"ok": False, "error": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task(
+    name="worker.tasks.generate_topic_reel",
+    bind=True,
+    max_retries=settings.task_max_retries,
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
+def generate_topic_reel(
+    self, upload_id: str, topic_id: str, facts: list[str], clip_ranges: list | None = None
+) -> dict:
+    """
+    Generation step for a single topic (I/O-bound, `generate` queue): call MiniMax on the
+    prompt pack facts and fetch the reel's media into the generation cache. With `clip_ranges`
+    ([start_sec, end_sec] of the topic's best chunks in a video upload) the reel will be cut
+    from the video itself and only the script/quiz are generated.
+    Returns the job for `render_topic_reel`. Transient failures are retried; other failures
+    are passed down the chain as a result so the chord callback always runs.
+    """
+    db = SessionLocal()
+    stage = stages.reel_stage(topic_id)
+    try:
+        upload = db.query(Upload).filter(Upload.id == uuid.UUID(upload_id)).one()
+        if stages.completed(db, upload.id, stage) is not None:
+            return {"ok": True, "topic_id": topic_id, "done": True}
+        stages.start(db, upload.id, stage)
         db.commit()
 
-        # For each topic: retrieve top-k chunks, build prompt pack, call MiniMax (mockable)
-        for t in leaf_topics[: max(1, min(len(leaf_topics), 8))]:
-            q_emb = embed_text(t.title)
-            top_chunks = retrieve_top_k_chunks_for_topic(db, upload.id, q_emb, k=6)
-            pack = build_prompt_pack(t.title, [c.text for c in top_chunks])
-            llm_out = minimax_llm_generate_concepts(
-                {"topic_title": pack.topic_title, "facts": pack.facts, "target_length_sec": course.reel_length_sec}
-            )
-            reel_script = llm_out.get("reel_script") or {}
-            script_lines = _concat_script(reel_script)
-            vtt = _make_vtt_from_script(script_lines)
-
-            # Generate media (mock: ffmpeg color video)
-            _ = minimax_tts_generate_voice("\n".join(script_lines), voice_style="default")
-            video_path = minimax_video_generate(
-                prompt=f"Vertical reel about {t.title}",
-                assets={"duration_sec": int(course.reel_length_sec)},
-            )
+        (reel_length_sec,) = db.query(Course.reel_length_sec).filter(Course.id == upload.course_id).one()
+        (title,) = db.query(Topic.title).filter(Topic.id == uuid.UUID(topic_id)).one()
+        # Return the connection to the pool before the provider calls: a thread-pool worker
+        # would otherwise hold one idle in transaction per running task.
+        db.close()
 
-            object_key = f"reels/{course.id}/{t.id}/{uuid.uuid4()}.mp4"
-            put_object(object_key=object_key, data=Path(video_path).read_bytes(), content_type="video/mp4")
+        # Call MiniMax (mockable) on the prompt pack built during ingestion
+        pack = PromptPack(topic_title=title, facts=facts)
+        llm_payload = {"topic_title": pack.topic_title, "facts": pack.facts, "target_length_sec": reel_length_sec}
+        llm_out = cached_json("llm", llm_payload, lambda: minimax_llm_generate_concepts(llm_payload))
+        reel_script = llm_out.get("reel_script") or {}
+        script_lines = _concat_script(reel_script)
+        vtt = _make_vtt_from_script(script_lines)
+        quiz_items = llm_out.get("quiz_items") or []
 
-            reel = Reel(
-                course_id=course.id,
-                topic_id=t.id,
-                video_object_key=object_key,
-                captions_vtt=vtt,
-                duration_sec=int(course.reel_length_sec),
-                source=ReelSource.generated,
-            )
-            db.add(reel)
-
-            quiz_items = llm_out.get("quiz_items") or []
-            if quiz_items:
-                qi = quiz_items[0]
-                quiz = Quiz(
-                    course_id=course.id,
-                    topic_id=t.id,
-                    question=str(qi.get("question") or f"Quick check: {t.title}?"),
-                    choices_json=qi.get("choices"),
-                    answer_json={"answer_index": qi.get("answer_index", 0)},
-                    explanation=qi.get("explanation"),
-                )
-                db.add(quiz)
-
-            up = (
-                db.query(UserProgress)
-                .filter(UserProgress.course_id == course.id, UserProgress.topic_id == t.id)
-                .filter(UserProgress.user_id == course.user_id)
-                .one_or_none()
-            )
-            if up is None:
-                db.add(
-                    UserProgress(
-                        user_id=course.user_id,
-                        course_id=course.id,
-                        topic_id=t.id,
-                        mastery_score=0.0,
-                        last_seen_at=None,
-                        next_review_at=datetime.now(timezone.utc),
+        ranges = select_ranges([TimeRange(*r) for r in clip_ranges or []], float(reel_length_sec))
+        spec = {
+            "script": "\n".join(script_lines),
+            "voice_style": "default",
+            "video_prompt": f"Vertical reel about {title}",
+            "duration_sec": int(reel_length_sec),
+            "music_mood": settings.reel_music_mood if settings.reel_music_enabled else None,
+            "captions_vtt": vtt if settings.reel_burn_captions else None,
+            "encode": asdict(EncodeOptions.from_settings()),
+        }
+        return {
+            "ok": True,
+            "upload_id": upload_id,
+            "topic_id": topic_id,
+            "captions_vtt": vtt,
+            "quiz": quiz_items[0] if quiz_items else None,
+            "clip_ranges": [[r.start_sec, r.end_sec] for r in ranges],
+            "reel_spec": spec,
+            # Clip reels need no provider media (render fetches it only if the cut fails).
+            "assets": None if ranges else _generate_assets(spec),
+        }
+    except Exception as e:
+        db.rollback()
+        _record_stage_failure(upload_id, stage, e)
+        _retry_if_transient(self, e)
+        logger.exception("generate_topic_reel failed for topic %s", topic_id)
+        return {"ok": False, "topic_id": topic_id, "error": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task(
+    name="worker.tasks.render_topic_reel",
+    bind=True,
+    max_retries=settings.task_max_retries,
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
+def render_topic_reel(self, job: dict) -> dict:
+    """
+    Encoding step for a single topic (CPU-bound, `encode` queue): cut the clip reel or compose
+    the generated one from the media fetched by `generate_topic_reel`, then store it.
+    The reel, quiz and the topic's stage checkpoint commit together, so a redelivered or
+    retried task never duplicates them. Failures are reported like `generate_topic_reel`'s.
+    """
+    topic_id = job.get("topic_id")
+    if not job.get("ok") or job.get("done"):
+        return {k: v for k, v in job.items() if k in ("ok", "topic_id", "error")}
+
+    upload_id = job["upload_id"]
+    db = SessionLocal()
+    stage = stages.reel_stage(topic_id)
+    try:
+        upload = db.query(Upload).filter(Upload.id == uuid.UUID(upload_id)).one()
+        if stages.completed(db, upload.id, stage) is not None:
+            return {"ok": True, "topic_id": topic_id}
+
+        upload_uuid, source_key, source_sha256 = upload.id, upload.object_key, upload.content_sha256
+        course_id, user_id, reel_length_sec = (
+            db.query(Course.id, Course.user_id, Course.reel_length_sec).filter(Course.id == upload.course_id).one()
+        )
+        topic_uuid, title = db.query(Topic.id, Topic.title).filter(Topic.id == uuid.UUID(topic_id)).one()
+        # The encode can run for minutes: hold no connection during it. The writes below
+        # start a fresh transaction.
+        db.close()
+        spec = job["reel_spec"]
+
+        object_key = None
+        source = ReelSource.generated
+        duration_sec = int(reel_length_sec)
+        ranges = [TimeRange(*r) for r in job["clip_ranges"]]
+        if ranges:
+            # Cut from the lecture by timestamp: stream copy when possible, no generation at all.
+            clip_spec = {
+                "source": source_sha256 or source_key,
+                "ranges": job["clip_ranges"],
+                "encode": spec["encode"],
+            }
+            try:
+                with tempfile.TemporaryDirectory(prefix="doomlearn_clip_") as workdir:
+                    clip = cached_media_entry(
+                        "clip",
+                        clip_spec,
+                        lambda: _render_clip(source_key, ranges, clip_spec["encode"], workdir),
+                        suffix=".mp4",
+                        content_type="video/mp4",
                     )
-                )
+                object_key = clip["object_key"]
+                source = ReelSource.clip
+                # Cuts are widened to keyframes, so the clip outlasts the requested ranges.
+                # Entries cached before the duration was recorded fall back to the ranges.
+                duration_sec = max(1, round(clip.get("duration_sec", sum(r.duration_sec for r in ranges))))
+            except ClipError:
+                logger.warning("clip reel failed for topic %s; generating instead", topic_id, exc_info=True)
+
+        if object_key is None:
+            # Render the reel (segments + voice + optional music + captions) in one ffmpeg pass.
+            # The rendered reel is cached under a content-addressed key, so unchanged topics reuse it.
+            assets = job["assets"] or _generate_assets(spec)
+            try:
+                object_key = _compose_cached(spec, assets)
+            except ClientError as e:
+                if (e.response.get("Error") or {}).get("Code") not in ("404", "NoSuchKey"):
+                    raise
+                # An asset was evicted by prune_generation_cache after the generate step.
+                assets = _generate_assets(spec)
+                object_key = _compose_cached(spec, assets)
+            if not settings.generation_cache_enabled:
+                # Nothing tracks uncached intermediates: drop them once the reel exists.
+                delete_objects([k for k in assets.values() if k])
 
-        upload.status = UploadStatus.ready
+        reel = Reel(
+            course_id=course_id,
+            topic_id=topic_uuid,
+            video_object_key=object_key,
+            captions_vtt=job["captions_vtt"],
+            duration_sec=duration_sec,
+            source=source,
+        )
+        db.add(reel)
+
+        qi = job["quiz"]
+        if qi:
+            quiz = Quiz(
+                course_id=course_id,
+                topic_id=topic_uuid,
+                question=str(qi.get("question") or f"Quick check: {title}?"),
+                choices_json=qi.get("choices"),
+                answer_json={"answer_index": qi.get("answer_index", 0)},
+                explanation=qi.get("explanation"),
+            )
+            db.add(quiz)
+
+        ensure_progress(db, user_id, course_id, [topic_uuid], next_review_at=datetime.now(timezone.utc))
+
+        db.flush()
+        if not stages.finish(db, upload_uuid, stage, {"reel_id": str(reel.id)}):
+            # A concurrent delivery of this task already stored the topic's reel.
+            db.rollback()
+            return {"ok": True, "topic_id": topic_id}
         db.commit()
-        return {"ok": True, "upload_id": upload_id}
+        return {"ok": True, "topic_id": topic_id}
     except Exception as e:
-        logger.exception("process_upload failed")
-        try:
-            upload = db.query(Upload).filter(Upload.id == uuid.UUID(upload_id)).one_or_none()
-            if upload is not None:
-                upload.status = UploadStatus.failed
-                db.commit()
-        except Exception:
-            pass
+        db.rollback()
+        _record_stage_failure(upload_id, stage, e)
+        _retry_if_transient(self, e)
+        logger.exception("render_topic_reel failed for topic %s", topic_id)
+        return {"ok": False, "topic_id": topic_id, "error": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task(name="worker.tasks.finalize_upload", bind=True, max_retries=settings.task_max_retries)
+def finalize_upload(self, results: list[dict], upload_id: str) -> dict:
+    """
+    Chord callback: the upload is ready if at least one topic produced a reel.
+    """
+    results = [r for r in results or [] if isinstance(r, dict)]
+    failed = [r for r in results if not r.get("ok")]
+    ok = len(results) > len(failed)
+
+    db = SessionLocal()
+    try:
+        upload = db.query(Upload).filter(Upload.id == uuid.UUID(upload_id)).one_or_none()
+        if upload is None:
+            return {"ok": False, "error": "upload not found"}
+
+        upload.status = UploadStatus.ready if ok else UploadStatus.failed
+        upload.metadata_json = {
+            **(upload.metadata_json or {}),
+            "failed_topics": [{"topic_id": r.get("topic_id"), "error": r.get("error")} for r in failed],
+            "stages": stages.summary(db, upload.id),
+        }
+        db.commit()
+
+        # New reels: drop the owner's ranked feed queue so the next /feed re-ranks.
+        course = db.query(Course).filter(Course.id == upload.course_id).one()
+        invalidate_course(course.user_id, course.id)
+        return {"ok": ok, "upload_id": upload_id, "topics": len(results), "failed": len(failed)}
+    except Exception as e:
+        db.rollback()
+        _retry_if_transient(self, e)
+        logger.exception("finalize_upload failed")
+        _mark_upload_failed(db, upload_id)
         return {"ok": False, "error": str(e)}
     finally:
         db.close()
 
+
+@celery_app.task(name="worker.tasks.flush_feed_events")
+def flush_feed_events(max_batches: int = 20) -> dict:
+    """
+    Drain buffered feed telemetry (POST /events/batch) into Postgres in large batches.
+    Scheduled by celery beat every EVENT_FLUSH_INTERVAL_SEC.
+    """
+    db = SessionLocal()
+    total = 0
+    try:
+        for _ in range(max_batches):
+            n = drain_events(db, batch_size=settings.event_flush_batch_size)
+            total += n
+            if n < settings.event_flush_batch_size:
+                break
+        return {"ok": True, "events": total}
+    except Exception as e:
+        logger.exception("flush_feed_events failed")
+        db.rollback()
+        return {"ok": False, "events": total, "error": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task(name="worker.tasks.prune_generation_cache")
+def prune_generation_cache() -> dict:
+    """TTL + LRU eviction for the MiniMax generation cache. Scheduled by celery beat."""
+    try:
+        return {"ok": True, "removed": prune_cache()}
+    except Exception as e:
+        logger.exception("prune_generation_cache failed")
+        return {"ok": False, "error": str(e)}